@@ -1,13 +1,19 @@
 import logging
+from datetime import timedelta
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.storage import Store
 # from homeassistant.helpers.translation import async_get_translations
 from pymodbus.client import ModbusTcpClient
+from .capture import TrafficCapture
+from .connection import async_get_connection, async_release_connection
 from .coordinator import LambdaHeatpumpCoordinator
+from .devices import async_release_device_infos
+from .e_manager import LambdaEManagerChannel
 
-from .const import MANUFACTURER, DOMAIN, CONF_MODBUS_HOST, CONF_MODBUS_PORT, CONF_SLAVE_ID, CONF_MODEL
+from .const import MANUFACTURER, DOMAIN, CONF_MODBUS_HOST, CONF_MODBUS_PORT, CONF_SLAVE_ID, CONF_MODEL, CONF_READ_GAP, DEFAULT_READ_GAP, CONF_MIN_SCAN_INTERVAL, CONF_MAX_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL, CONF_INFLIGHT_WINDOW, DEFAULT_INFLIGHT_WINDOW, STORAGE_KEY, STORAGE_VERSION, CONF_E_MANAGER_SOURCE, CONF_E_MANAGER_INTERVAL, DEFAULT_E_MANAGER_INTERVAL, CONF_CAPTURE, CAPTURE_FILENAME
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,11 +33,39 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
 
     # _LOGGER.debug(f"Host: {host}, Port: {port}, Slave ID: {slave_id}")  # Prüfe, ob die Werte korrekt sind
 
-    # Erstellen eines Coordinators für die gemeinsame Datennutzung
-    coordinator = LambdaHeatpumpCoordinator(hass, host, port, slave_id)
+    # Einträge mit derselben Adresse (andere Slave-ID) teilen sich eine Verbindung
+    connection = async_get_connection(
+        hass, host, port, config_entry.options.get(CONF_INFLIGHT_WINDOW, DEFAULT_INFLIGHT_WINDOW),
+        user=config_entry.entry_id,
+    )
 
-    # Der Coordinator muss gestartet werden
-    await coordinator.async_config_entry_first_refresh()
+    # Erstellen eines Coordinators für die gemeinsame Datennutzung
+    coordinator = LambdaHeatpumpCoordinator(
+        hass, host, port, slave_id,
+        read_gap=config_entry.options.get(CONF_READ_GAP, DEFAULT_READ_GAP),
+        min_interval=timedelta(seconds=config_entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL)),
+        max_interval=timedelta(seconds=config_entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)),
+        connection=connection,
+        cache_key=STORAGE_KEY.format(entry_id=config_entry.entry_id),
+    )
+    # Aufzeichnung des Modbus-Verkehrs zur Fehlersuche (Wiedergabe mit capture.LambdaReplayConnection)
+    if config_entry.options.get(CONF_CAPTURE, False):
+        coordinator.capture = TrafficCapture(
+            hass, hass.config.path(CAPTURE_FILENAME.format(entry_id=config_entry.entry_id)), coordinator.capture_header
+        )
+
+    # Mit gespeicherten Werten starten die Entitäten sofort, die erste Abfrage
+    # läuft danach im Hintergrund. Ohne Zwischenspeicher prüft die erste Abfrage
+    # nur die Verbindung, da sich die Register erst mit den Entitäten anmelden;
+    # die Werte liest ein vollständiger Zyklus nach dem Einrichten der Plattformen
+    restored = await coordinator.async_restore_cache()
+    if not restored:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception:
+            await coordinator.async_shutdown()
+            async_release_connection(hass, connection, config_entry.entry_id)
+            raise
 
     # Speichere den Coordinator in `hass.data`
     hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = coordinator
@@ -40,11 +74,36 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
     # await hass.config_entries.async_forward_entry_setups(config_entry, ["sensor"])
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
 
+    if restored:
+        config_entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN} first refresh {config_entry.entry_id}"
+        )
+    else:
+        await coordinator.async_refresh()
+
+    # Optionaler schneller Kanal für den PV-Überschuss an den E-Manager
+    if source := config_entry.options.get(CONF_E_MANAGER_SOURCE):
+        channel = LambdaEManagerChannel(
+            hass, coordinator, source,
+            timedelta(seconds=config_entry.options.get(CONF_E_MANAGER_INTERVAL, DEFAULT_E_MANAGER_INTERVAL)),
+        )
+        channel.async_start()
+        config_entry.async_on_unload(channel.async_stop)
+
     # Register the options flow
     config_entry.add_update_listener(async_update_options)
 
     return True
 
+async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
+    """Migriert ältere Einträge auf die aktuelle Version."""
+    if config_entry.version == 1:
+        # Die unique_id enthält seit Version 2 die Slave-ID
+        unique_id = f"{config_entry.data[CONF_MODBUS_HOST]}:{config_entry.data[CONF_MODBUS_PORT]}:{config_entry.data[CONF_SLAVE_ID]}"
+        _LOGGER.debug(f"Migrating entry {config_entry.entry_id} to version 2, unique_id {unique_id}")
+        hass.config_entries.async_update_entry(config_entry, unique_id=unique_id, version=2)
+    return True
+
 async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Entferne die Integration."""
     # unload_ok = await hass.config_entries.async_forward_entry_unload(config_entry, "sensor")
@@ -58,7 +117,17 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
     #     hass.data[DOMAIN].pop(config_entry.entry_id)
     # return unload_ok
 
-    return await hass.config_entries.async_unload_platforms(config_entry, PLATFORMS)
+    unload_ok = await hass.config_entries.async_unload_platforms(config_entry, PLATFORMS)
+    if unload_ok:
+        coordinator = hass.data[DOMAIN].pop(config_entry.entry_id)
+        await coordinator.async_shutdown()
+        async_release_connection(hass, coordinator.connection, config_entry.entry_id)
+        async_release_device_infos(hass, config_entry)
+    return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    """Entferne den Zwischenspeicher eines gelöschten Eintrags."""
+    await Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=config_entry.entry_id)).async_remove()
 
 async def async_reload_entry(hass, config_entry):
     """Reload config entry."""
@@ -0,0 +1,242 @@
+"""Benchmark für die Abfragezyklen des LambdaHeatpumpCoordinator.
+
+Startet den Simulator in einem eigenen Prozess, meldet alle Register der
+Szenarien am Coordinator an und misst `_async_update_data` über mehrere
+vollständige Zyklen. Das Ergebnis wird als JSON ausgegeben, z.B.:
+
+    python -m custom_components.lambda_heatpumps.benchmark --cycles 50 --latency 20 --output bench.json
+
+Mit `--replay` wird statt des Simulators eine Aufzeichnung (Option "capture")
+wiedergegeben; `--speed` beschleunigt die aufgezeichneten Antwortzeiten,
+`--speed 0` antwortet ohne Verzögerung. `--loss` verwirft einen Anteil der
+Anfragen, um Timeouts, Wiederholungen und den Rückfall auf eine Anfrage zur
+Zeit zu messen:
+
+    python -m custom_components.lambda_heatpumps.benchmark --replay lambda_heatpumps_capture_<entry_id>.ndjson --speed 10
+    python -m custom_components.lambda_heatpumps.benchmark --cycles 50 --latency 20 --loss 0.01
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import asdict, replace
+import json
+import logging
+import multiprocessing
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from .capture import LambdaReplayConnection, load_capture
+from .connection import LambdaModbusConnection
+from .const import DEFAULT_INFLIGHT_WINDOW, DEFAULT_READ_GAP, WORD_ORDER_BIG
+from .coordinator import LambdaHeatpumpCoordinator
+from .simulator import LambdaModbusSimulator, SimulatorConfig, module_registers
+
+SCENARIOS = {
+    "small": SimulatorConfig(heatpumps=1, boilers=0, buffers=0, solar=0, heatingcircuits=1),
+    "maximal": SimulatorConfig(heatpumps=3, boilers=5, buffers=5, solar=2, heatingcircuits=12),
+}
+
+
+def _run_simulator(config: SimulatorConfig, ready) -> None:
+    """Prozess-Einstiegspunkt: betreibt den Simulator bis zum Beenden."""
+
+    async def run() -> None:
+        simulator = LambdaModbusSimulator(config, port=0)
+        await simulator.start()
+        ready.send(simulator.port)
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+def _summary(values: list[float]) -> dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+async def _async_cycle(coordinator: LambdaHeatpumpCoordinator) -> None:
+    """Führt einen Zyklus über alle Polling-Stufen aus; Fehlschläge zählen die Metriken des Coordinators."""
+    # Alle Polling-Stufen fällig machen, damit jeder Zyklus die volle Registerkarte liest
+    coordinator._tier_last_poll.clear()
+    try:
+        coordinator.data = await coordinator._async_update_data()
+    except UpdateFailed:
+        pass
+
+
+async def _async_run_cycles(coordinator: LambdaHeatpumpCoordinator, cycles: int) -> dict:
+    """Führt vollständige Abfragezyklen aus und misst Zeit und CPU."""
+    wall, cpu = [], []
+    for _ in range(cycles):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        await _async_cycle(coordinator)
+        wall.append((time.perf_counter() - wall_start) * 1000)
+        cpu.append((time.process_time() - cpu_start) * 1000)
+    return {"wall_ms": _summary(wall), "cpu_ms": _summary(cpu)}
+
+
+async def _async_measure_allocations(coordinator: LambdaHeatpumpCoordinator, cycles: int) -> dict:
+    """Misst Speicherallokationen pro Zyklus mit tracemalloc."""
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(cycles):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await _async_cycle(coordinator)
+            after, peak = tracemalloc.get_traced_memory()
+            peaks.append((peak - before) / 1024)
+            retained.append((after - before) / 1024)
+    finally:
+        tracemalloc.stop()
+    return {"peak_kib": _summary(peaks), "retained_kib": _summary(retained)}
+
+
+async def async_benchmark_scenario(name: str, config: SimulatorConfig, cycles: int, window: int = DEFAULT_INFLIGHT_WINDOW) -> dict:
+    """Misst ein Szenario gegen einen Simulator in einem eigenen Prozess."""
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_run_simulator, args=(config, sender), daemon=True)
+    process.start()
+    try:
+        port = await asyncio.get_running_loop().run_in_executor(None, receiver.recv)
+
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass = HomeAssistant(config_dir)
+            connection = LambdaModbusConnection("127.0.0.1", port, window)
+            coordinator = LambdaHeatpumpCoordinator(hass, "127.0.0.1", port, 1, connection=connection)
+            registers = set()
+            for register, description in module_registers(config):
+                coordinator.add_register(register, description.data_type, description.poll_tier)
+                registers.add(register)
+
+            # Aufwärmen: Verbindung aufbauen, Lesepläne kompilieren
+            coordinator._tier_last_poll.clear()
+            coordinator.data = await coordinator._async_update_data()
+            requests = coordinator.metrics.requests
+
+            timing = await _async_run_cycles(coordinator, cycles)
+            result = {
+                "registers": len(registers),
+                "cycles": cycles,
+                "round_trips_per_cycle": (coordinator.metrics.requests - requests) / cycles,
+                "read_errors": coordinator.metrics.read_errors,
+                "timeouts": coordinator.metrics.timeouts,
+                "retries": coordinator.metrics.retries,
+                "failed_cycles": coordinator.metrics.failed_cycles,
+                "inflight_window": connection.window,
+                **timing,
+                "allocations": await _async_measure_allocations(coordinator, max(1, cycles // 5)),
+            }
+            await coordinator.async_shutdown()
+            connection.close()
+            await hass.async_stop(force=True)
+            return result
+    finally:
+        process.terminate()
+        process.join()
+
+
+async def async_benchmark_replay(header: dict, records: list[dict], cycles: int, speed: float) -> dict:
+    """Misst Abfragezyklen gegen eine aufgezeichnete Anlage."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        connection = LambdaReplayConnection(records, speed)
+        coordinator = LambdaHeatpumpCoordinator(
+            hass, "replay", 502, header.get("slave", 1),
+            read_gap=header.get("read_gap", DEFAULT_READ_GAP),
+            word_order=header.get("word_order", WORD_ORDER_BIG),
+            connection=connection,
+        )
+        for register, (register_type, poll_tier) in header.get("registers", {}).items():
+            coordinator.add_register(int(register), register_type, poll_tier)
+
+        coordinator._tier_last_poll.clear()
+        coordinator.data = await coordinator._async_update_data()
+        requests = coordinator.metrics.requests
+
+        timing = await _async_run_cycles(coordinator, cycles)
+        result = {
+            "registers": len(header.get("registers", {})),
+            "recorded_requests": len(records),
+            "speed": speed,
+            "cycles": cycles,
+            "round_trips_per_cycle": (coordinator.metrics.requests - requests) / cycles,
+            "read_errors": coordinator.metrics.read_errors,
+            "timeouts": coordinator.metrics.timeouts,
+            **timing,
+            "allocations": await _async_measure_allocations(coordinator, max(1, cycles // 5)),
+        }
+        await coordinator.async_shutdown()
+        await hass.async_stop(force=True)
+        return result
+
+
+async def async_run_benchmarks(
+    cycles: int, config: SimulatorConfig, scenarios: list[str], window: int = DEFAULT_INFLIGHT_WINDOW
+) -> dict:
+    """Führt die gewählten Szenarien aus und liefert das JSON-Ergebnis."""
+    manifest = json.loads((Path(__file__).parent / "manifest.json").read_text(encoding="utf-8"))
+    results = {}
+    for name in scenarios:
+        scenario = replace(
+            SCENARIOS[name],
+            latency=config.latency,
+            jitter=config.jitter,
+            packet_loss=config.packet_loss,
+        )
+        results[name] = {
+            "simulator": asdict(scenario),
+            **await async_benchmark_scenario(name, scenario, cycles, window),
+        }
+    return {
+        "version": manifest.get("version"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.time(),
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Lambda coordinator poll-cycle benchmark")
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulierte Latenz pro Anfrage in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Simulierter Jitter in ms")
+    parser.add_argument("--loss", type=float, default=0.0, help="Anteil verworfener Anfragen (0-1)")
+    parser.add_argument("--window", type=int, default=DEFAULT_INFLIGHT_WINDOW, help="Gleichzeitige Modbus-Anfragen")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append")
+    parser.add_argument("--replay", nargs="+", metavar="FILE", help="Aufzeichnung(en) statt Simulator, älteste zuerst")
+    parser.add_argument("--speed", type=float, default=1.0, help="Wiedergabegeschwindigkeit, 0 = ohne Verzögerung")
+    parser.add_argument("--output", help="JSON-Datei für die Ergebnisse (Standard: stdout)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.replay:
+        header, records = load_capture(args.replay)
+        results = asyncio.run(async_benchmark_replay(header, records, args.cycles, args.speed))
+    else:
+        config = SimulatorConfig(latency=args.latency / 1000, jitter=args.jitter / 1000, packet_loss=args.loss)
+        results = asyncio.run(async_run_benchmarks(args.cycles, config, args.scenario or list(SCENARIOS), args.window))
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""Aufzeichnung und Wiedergabe des Modbus-Verkehrs eines Coordinators.
+
+Jede Zeile der Aufzeichnung ist ein JSON-Objekt. Jede Datei beginnt mit einer
+Kopfzeile, die die angemeldeten Register des Coordinators beschreibt:
+
+    {"header": {"slave": 1, "word_order": "big", "registers": {"1004": ["int16", "normal"]}}}
+
+danach folgt je Anfrage eine Zeile mit Zeitstempel (Unix-Zeit), Dauer in ms,
+Slave-ID, Function Code, Startadresse, Anzahl bzw. geschriebenen Werten und
+der Antwort (`regs`), dem Exception Code (`exc`) oder dem Fehler (`err`):
+
+    {"t": 1718000000.123, "ms": 12.5, "slave": 1, "fc": 3, "addr": 1000, "count": 8, "regs": [...]}
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Callable, Iterable
+import json
+import logging
+import os
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+
+from .connection import READ_HOLDING_REGISTERS, WRITE_MULTIPLE_REGISTERS, ModbusResponse
+from .const import (
+    CAPTURE_BACKUPS,
+    CAPTURE_FLUSH_DELAY,
+    CAPTURE_FLUSH_LINES,
+    CAPTURE_MAX_BYTES,
+    MODBUS_ILLEGAL_DATA_ADDRESS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TrafficCapture:
+    """Schreibt Anfrage/Antwort-Paare gepuffert im Executor in eine rotierende NDJSON-Datei."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        path: str,
+        header: Callable[[], dict],
+        max_bytes: int = CAPTURE_MAX_BYTES,
+        backups: int = CAPTURE_BACKUPS,
+    ) -> None:
+        self.hass = hass
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._header = header
+        self._buffer: list[str] = []
+        self._flush_lock = asyncio.Lock()
+        self._unsub_flush = None
+        self.records = 0
+
+    @callback
+    def record(self, slave, function, address, request, duration, response=None, error=None) -> None:
+        """Puffert eine Anfrage; `request` ist die Anzahl (lesen) oder die Werte (schreiben)."""
+        entry = {
+            "t": round(time.time() - duration, 3),
+            "ms": round(duration * 1000, 2),
+            "slave": slave,
+            "fc": function,
+            "addr": address,
+        }
+        if function == READ_HOLDING_REGISTERS:
+            entry["count"] = request
+        else:
+            entry["values"] = list(request)
+        if error is not None:
+            entry["err"] = type(error).__name__
+        elif response.isError():
+            entry["exc"] = response.exception_code
+        elif function == READ_HOLDING_REGISTERS:
+            entry["regs"] = list(response.registers)
+        self._buffer.append(json.dumps(entry, separators=(",", ":")))
+        self.records += 1
+
+        if len(self._buffer) >= CAPTURE_FLUSH_LINES:
+            self.hass.async_create_task(self.async_flush())
+        elif self._unsub_flush is None:
+            self._unsub_flush = async_call_later(self.hass, CAPTURE_FLUSH_DELAY, self._async_handle_flush_timer)
+
+    async def _async_handle_flush_timer(self, _now) -> None:
+        self._unsub_flush = None
+        await self.async_flush()
+
+    async def async_flush(self) -> None:
+        """Schreibt den Puffer im Executor; Schreibvorgänge laufen nacheinander."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        async with self._flush_lock:
+            lines, self._buffer = self._buffer, []
+            if not lines:
+                return
+            header = json.dumps({"header": self._header()}, separators=(",", ":"))
+            try:
+                await self.hass.async_add_executor_job(self._write, header, lines)
+            except OSError as err:
+                _LOGGER.error(f"Error writing Modbus capture {self.path}: {err}")
+
+    def _write(self, header: str, lines: list[str]) -> None:
+        """Hängt die Zeilen an und rotiert die Datei wie logging.handlers.RotatingFileHandler."""
+        with open(self.path, "a", encoding="utf-8") as file:
+            if file.tell() == 0:
+                file.write(header + "\n")
+            file.write("\n".join(lines) + "\n")
+            size = file.tell()
+        if size < self.max_bytes:
+            return
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    async def async_close(self) -> None:
+        await self.async_flush()
+
+
+def load_capture(paths: Iterable[str]) -> tuple[dict, list[dict]]:
+    """Liest Aufzeichnungen (älteste zuerst) und gibt die erste Kopfzeile und alle Anfragen zurück."""
+    header, records = {}, []
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if "header" in entry:
+                    header = header or entry["header"]
+                else:
+                    records.append(entry)
+    return header, records
+
+
+class LambdaReplayConnection:
+    """Ersetzt LambdaModbusConnection und beantwortet Anfragen aus einer Aufzeichnung.
+
+    Antworten werden je (Slave, Function Code, Adresse, Anzahl) in der
+    aufgezeichneten Reihenfolge ausgegeben und danach von vorn wiederholt.
+    Jede Antwort wird um die aufgezeichnete Dauer geteilt durch `speed`
+    verzögert; mit `speed=0` ohne Verzögerung. Nicht aufgezeichnete Anfragen
+    erhalten "Illegal Data Address".
+    """
+
+    def __init__(self, records: Iterable[dict], speed: float = 1.0) -> None:
+        self.host = "replay"
+        self.port = 0
+        self.users = 0
+        self.window = self.configured_window = 1
+        self.speed = speed
+        self.poll_lock = asyncio.Lock()
+        self.requests = 0
+        self._responses: dict[tuple, deque] = {}
+        for record in records:
+            self._responses.setdefault(self._key(record), deque()).append(record)
+
+    @staticmethod
+    def _key(record: dict) -> tuple:
+        if record["fc"] == READ_HOLDING_REGISTERS:
+            return record["slave"], record["fc"], record["addr"], record["count"]
+        return record["slave"], record["fc"], record["addr"], len(record["values"])
+
+    @property
+    def connected(self):
+        return True
+
+    async def async_connect(self):
+        return False
+
+    async def _async_replay(self, key: tuple, metrics=None) -> ModbusResponse:
+        self.requests += 1
+        records = self._responses.get(key)
+        if not records:
+            return ModbusResponse(key[1], exception_code=MODBUS_ILLEGAL_DATA_ADDRESS)
+        record = records[0]
+        records.rotate(-1)
+        if self.speed > 0:
+            await asyncio.sleep(record["ms"] / 1000 / self.speed)
+        if "err" in record:
+            if metrics is not None and record["err"] != ConnectionException.__name__:
+                metrics.record_timeout()
+            if record["err"] == ConnectionException.__name__:
+                raise ConnectionException(f"Recorded connection error at {record['t']}")
+            raise ModbusIOException(f"Recorded {record['err']} at {record['t']}")
+        if "exc" in record:
+            return ModbusResponse(key[1], exception_code=record["exc"])
+        return ModbusResponse(key[1], record.get("regs", []))
+
+    async def async_read_holding_registers(self, address, count, slave, metrics=None):
+        return await self._async_replay((slave, READ_HOLDING_REGISTERS, address, count), metrics)
+
+    async def async_write_registers(self, address, values, slave, metrics=None):
+        return await self._async_replay((slave, WRITE_MULTIPLE_REGISTERS, address, len(values)), metrics)
+
+    def close(self):
+        pass
@@ -16,9 +16,11 @@ from homeassistant.const import ATTR_TEMPERATURE, UnitOfTemperature
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, MANUFACTURER
+from .const import DOMAIN
 from .coordinator import LambdaHeatpumpCoordinator
+from .devices import async_get_device_infos, entry_descriptions, index_descriptions
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -47,8 +49,10 @@ CLIMATE_DESCRIPTIONS: tuple[LambdaClimateEntityDescription, ...] = (
     ),
     # Fügen Sie hier weitere ClimateEntityDescriptions hinzu
 )
+# Beschreibungen je Gerät (Modul, Instanz)
+CLIMATE_DESCRIPTIONS_BY_DEVICE = index_descriptions(CLIMATE_DESCRIPTIONS)
 
-class LambdaHeatpumpClimate(ClimateEntity):
+class LambdaHeatpumpClimate(CoordinatorEntity, ClimateEntity):
     """Representation of a Lambda Heatpump climate device."""
 
     def __init__(
@@ -59,7 +63,13 @@ class LambdaHeatpumpClimate(ClimateEntity):
         device_info: DeviceInfo,
     ) -> None:
         """Initialize the climate device."""
-        self.coordinator = coordinator
+        # Only wake up for changes of the registers this entity displays
+        super().__init__(
+            coordinator,
+            context=frozenset(
+                (description.register_temp, description.register_setpoint, description.register_mode)
+            ),
+        )
         self.entity_description = description
         self._config_entry = config_entry
 
@@ -76,18 +86,29 @@ class LambdaHeatpumpClimate(ClimateEntity):
         self._target_temp_high = None
         self._target_temp_low = None
 
-        self.coordinator.add_register(description.register_temp, "int16")
-        self.coordinator.add_register(description.register_setpoint, "int16")
-        self.coordinator.add_register(description.register_mode, "int16")
+        # Abgefragt werden die Register erst, wenn die Entität hinzugefügt ist
+        self._subscriptions = {}
 
 
         _LOGGER.debug("Description: %s", description)
         _LOGGER.debug("Übersetzung: %s", self.entity_description.key)
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        description = self.entity_description
+        for register in (description.register_temp, description.register_setpoint, description.register_mode):
+            self._subscriptions[register] = self.coordinator.add_register(register, "int16")
+
+    async def async_will_remove_from_hass(self) -> None:
+        for subscription in self._subscriptions.values():
+            self.coordinator.remove_register(subscription)
+        self._subscriptions = {}
+        await super().async_will_remove_from_hass()
+
     @property
     def current_temperature(self) -> float | None:
         """Return the current temperature."""
-        value = self.coordinator.data.get(f"register_{self.entity_description.register_temp}")
+        value = self.coordinator.value(self._subscriptions.get(self.entity_description.register_temp))
         if value is None:
             return None
         return value * self.entity_description.factor
@@ -95,7 +116,7 @@ class LambdaHeatpumpClimate(ClimateEntity):
     @property
     def target_temperature(self) -> float | None:
         """Return the temperature we try to reach."""
-        value = self.coordinator.data.get(f"register_{self.entity_description.register_setpoint}")
+        value = self.coordinator.value(self._subscriptions.get(self.entity_description.register_setpoint))
         if value is None:
             return None
         return value * self.entity_description.factor
@@ -138,9 +159,8 @@ class LambdaHeatpumpClimate(ClimateEntity):
         await self.coordinator.async_write_register(
             self.entity_description.register_setpoint, 
             scaled_temp,
-            register_type='int16'  # oder der entsprechende Typ für Ihr Register
+            register_type=self.entity_description.data_type
         )
-        await self.coordinator.async_request_refresh()
     
     
     async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
@@ -148,7 +168,6 @@ class LambdaHeatpumpClimate(ClimateEntity):
             await self.coordinator.async_write_register(self.entity_description.register_mode, 1)
         elif hvac_mode == HVACMode.OFF:
             await self.coordinator.async_write_register(self.entity_description.register_mode, 0)
-        await self.coordinator.async_request_refresh()
 
     async def _async_set_target_temp(self, temperature):
         """Set new target temperature."""
@@ -170,34 +189,14 @@ class LambdaHeatpumpClimate(ClimateEntity):
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
-
-    num_boilers = config_entry.data.get("amount_of_boilers", 1)
-    model = config_entry.data.get("model", "Unknown Model")
-
-    device_infos = {}
-    for i in range(1, num_boilers + 1):
-        device_infos[f"boiler_{i}"] = DeviceInfo(
-            identifiers={(DOMAIN, f"{config_entry.entry_id}_boiler_{i}")},
-            name=f"Lambda Boiler {i}",
-            manufacturer=MANUFACTURER,
-            model=model,
+    device_infos = async_get_device_infos(hass, config_entry)
+
+    async_add_entities(
+        LambdaHeatpumpClimate(
+            coordinator=coordinator,
+            config_entry=config_entry,
+            description=description,
+            device_info=device_info,
         )
-
-    climate_devices = []
-    for description in CLIMATE_DESCRIPTIONS:
-        if "boiler_" in description.key and int(description.key.split('_')[1]) > num_boilers:
-            continue
-
-        category = description.key.split('_')[0]
-        device_info = device_infos.get(f"{category}_{description.key.split('_')[1]}", None)
-
-        if device_info:
-            climate_device = LambdaHeatpumpClimate(
-                coordinator=coordinator,
-                config_entry=config_entry,
-                description=description,
-                device_info=device_info, 
-            )
-            climate_devices.append(climate_device)
-
-    async_add_entities(climate_devices)
\ No newline at end of file
+        for description, device_info in entry_descriptions(CLIMATE_DESCRIPTIONS_BY_DEVICE, device_infos)
+    )
\ No newline at end of file
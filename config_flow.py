@@ -4,37 +4,61 @@ from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import ConfigEntryNotReady
-from pymodbus.client import ModbusTcpClient
-from pymodbus.exceptions import ConnectionException
+from homeassistant.helpers import selector
+from pymodbus.exceptions import ConnectionException, ModbusIOException
 
-from .const import DOMAIN, CONF_MODBUS_HOST, CONF_MODBUS_PORT, CONF_SLAVE_ID, DEFAULT_PORT, DEFAULT_SLAVE_ID, CONF_MODEL, CONF_AMOUNT_OF_HEATPUMPS, CONF_AMOUNT_OF_BOILERS, CONF_AMOUNT_OF_BUFFERS, CONF_AMOUNT_OF_SOLAR, CONF_AMOUNT_OF_HEAT_CIRCUITS
+from .const import DOMAIN, CONF_MODBUS_HOST, CONF_MODBUS_PORT, CONF_SLAVE_ID, DEFAULT_PORT, DEFAULT_SLAVE_ID, CONF_MODEL, CONF_READ_GAP, DEFAULT_READ_GAP, CONF_MIN_SCAN_INTERVAL, CONF_MAX_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL, CONF_INFLIGHT_WINDOW, DEFAULT_INFLIGHT_WINDOW, DATA_CONNECTIONS, MODULE_MAX_INSTANCES, MODULE_COUNT_KEYS, MODULE_DEFAULT_COUNTS, CONF_E_MANAGER_SOURCE, CONF_E_MANAGER_INTERVAL, DEFAULT_E_MANAGER_INTERVAL, CONF_CAPTURE
+from .connection import LambdaModbusConnection
+from .modules import async_discover_modules
 
 _LOGGER = logging.getLogger(__name__)
 
 
+async def async_discover(hass, host, port, slave_id):
+    """Prüft die Verbindung und erkennt die vorhandenen Module.
+
+    Eine bereits bestehende Verbindung zum Gateway wird mitbenutzt, sonst
+    wird eine Verbindung nur für die Erkennung aufgebaut.
+    """
+    connection = hass.data.get(DATA_CONNECTIONS, {}).get((host, port))
+    temporary = connection is None
+    if temporary:
+        connection = LambdaModbusConnection(host, port)
+    try:
+        await connection.async_connect()
+        return await async_discover_modules(connection, slave_id)
+    finally:
+        if temporary:
+            connection.close()
+
+
 class LambdaHeatpumpsConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
-    VERSION = 1
+    # Version 2: unique_id "host:port:slave" statt "host:port"
+    VERSION = 2
 
     def __init__(self):
         self._logger = logging.getLogger(__name__)
+        self._data = {}
+        self._discovered = {}
 
     async def async_step_user(self, user_input=None) -> FlowResult:
         errors = {}
         if user_input is not None:
+            # Außerhalb des try, damit der Abbruch nicht als "unknown" gemeldet wird
+            await self.async_set_unique_id(
+                f"{user_input[CONF_MODBUS_HOST]}:{user_input[CONF_MODBUS_PORT]}:{user_input[CONF_SLAVE_ID]}"
+            )
+            self._abort_if_unique_id_configured()
             try:
-                await self.hass.async_add_executor_job(
-                    self.test_connection,
+                self._discovered = await async_discover(
+                    self.hass,
                     user_input[CONF_MODBUS_HOST],
                     user_input[CONF_MODBUS_PORT],
                     user_input[CONF_SLAVE_ID],
                 )
-                await self.async_set_unique_id(f"{user_input[CONF_MODBUS_HOST]}:{user_input[CONF_MODBUS_PORT]}")
-                self._abort_if_unique_id_configured()
-                return self.async_create_entry(
-                    title=f"Lambda Wärmepumpe ({user_input[CONF_MODEL]})",
-                    data=user_input,
-                )
-            except ConnectionException:
+                self._data = user_input
+                return await self.async_step_modules()
+            except (ConnectionException, ModbusIOException):
                 errors["base"] = "cannot_connect"
             except ValueError:
                 errors["base"] = "invalid_slave_id"
@@ -48,23 +72,26 @@ class LambdaHeatpumpsConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    async def async_step_modules(self, user_input=None) -> FlowResult:
+        """Zeigt die erkannten Module an; die Anzahl kann angepasst werden."""
+        if user_input is not None:
+            return self.async_create_entry(
+                title=f"Lambda Wärmepumpe ({self._data[CONF_MODEL]})",
+                data={**self._data, **user_input},
+            )
+
+        return self.async_show_form(
+            step_id="modules",
+            data_schema=vol.Schema({
+                vol.Required(key, default=self._discovered.get(module, 0)): vol.All(int, vol.Range(min=0, max=MODULE_MAX_INSTANCES[module]))
+                for module, key in MODULE_COUNT_KEYS.items()
+            }),
+        )
 
     @staticmethod
     @callback
     def async_get_options_flow(config_entry):
         return LambdaHeatpumpsOptionsFlow(config_entry)
-    
-    def test_connection(self, host, port, slave_id):
-        """Test the connection to the Modbus device."""
-        client = ModbusTcpClient(host=host, port=port)
-        try:
-            if not client.connect():
-                raise ConnectionException("Cannot connect to Modbus client")
-            result = client.read_holding_registers(100, 1, unit=slave_id)
-            if result.isError():
-                raise ValueError("Invalid slave ID")
-        finally:
-            client.close()
 
     def get_config_schema(self):
         model_options = ["EU8L", "EU10L", "EU13L", "EU15L", "EU20L"]
@@ -73,11 +100,6 @@ class LambdaHeatpumpsConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             vol.Required(CONF_MODBUS_PORT, default=DEFAULT_PORT): int,
             vol.Required(CONF_SLAVE_ID, default=DEFAULT_SLAVE_ID): int,
             vol.Required(CONF_MODEL): vol.In(model_options),
-            vol.Required(CONF_AMOUNT_OF_HEATPUMPS, default=1): int,
-            vol.Required(CONF_AMOUNT_OF_BOILERS, default=1): int,
-            vol.Required(CONF_AMOUNT_OF_BUFFERS, default=1): int,
-            vol.Required(CONF_AMOUNT_OF_SOLAR, default=0): int,
-            vol.Required(CONF_AMOUNT_OF_HEAT_CIRCUITS, default=1): int,
         })
 
 class LambdaHeatpumpsOptionsFlow(config_entries.OptionsFlow):
@@ -87,54 +109,66 @@ class LambdaHeatpumpsOptionsFlow(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input=None):
         _LOGGER.debug(f"async_step_init called with user_input: {user_input}")
-        if user_input is not None:
+        errors = {}
+        if user_input is not None and user_input[CONF_MIN_SCAN_INTERVAL] > user_input[CONF_MAX_SCAN_INTERVAL]:
+            errors["base"] = "invalid_scan_interval"
+        elif user_input is not None:
             _LOGGER.debug("Processing user input")
-            # Überprüfen Sie, ob sich Host oder Slave-ID geändert haben
-            if (user_input[CONF_MODBUS_HOST] != self.config_entry.data[CONF_MODBUS_HOST] or
-                user_input[CONF_SLAVE_ID] != self.config_entry.data[CONF_SLAVE_ID]):
-                # Testen Sie die neue Verbindung
-                try:
-                    await self.hass.async_add_executor_job(
-                        self.test_connection,
-                        user_input[CONF_MODBUS_HOST],
-                        self.config_entry.data[CONF_MODBUS_PORT],
-                        user_input[CONF_SLAVE_ID],
+            # Host, Slave-ID und Anzahl der Module liegen in entry.data, alles andere in den Optionen
+            options = dict(user_input)
+            data = {
+                **self.config_entry.data,
+                **{key: options.pop(key) for key in (CONF_MODBUS_HOST, CONF_SLAVE_ID, *MODULE_COUNT_KEYS.values())},
+            }
+            unique_id = self.config_entry.unique_id
+            if (data[CONF_MODBUS_HOST] != self.config_entry.data[CONF_MODBUS_HOST] or
+                data[CONF_SLAVE_ID] != self.config_entry.data[CONF_SLAVE_ID]):
+                unique_id = f"{data[CONF_MODBUS_HOST]}:{data[CONF_MODBUS_PORT]}:{data[CONF_SLAVE_ID]}"
+                errors = await self._async_validate_connection(data, unique_id)
+
+            if not errors:
+                if data != self.config_entry.data:
+                    # Daten und Optionen gemeinsam aktualisieren, damit der Eintrag nur einmal neu geladen wird
+                    self.hass.config_entries.async_update_entry(
+                        self.config_entry, data=data, options=options, unique_id=unique_id
                     )
-                except ConnectionException:
-                    return self.async_abort(reason="cannot_connect")
-                except ValueError:
-                    return self.async_abort(reason="invalid_slave_id")
-                
-                # Wenn die Verbindung erfolgreich war, aktualisieren Sie die Konfiguration
-                new_data = {**self.config_entry.data, **user_input}
-                self.hass.config_entries.async_update_entry(self.config_entry, data=new_data)
-                return self.async_abort(reason="restart_required")
-            
-            return self.async_create_entry(title="", data=user_input)
+                return self.async_create_entry(title="", data=options)
 
         _LOGGER.debug("Showing form")
         schema = self.get_options_schema()
-        return self.async_show_form(step_id="init", data_schema=schema)
+        if errors:
+            # Eingaben nach einem Fehler erhalten
+            schema = self.add_suggested_values_to_schema(schema, user_input)
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
 
     def get_options_schema(self):
         return vol.Schema({
             vol.Required(CONF_MODBUS_HOST, default=self.config_entry.data[CONF_MODBUS_HOST]): str,
             vol.Required(CONF_SLAVE_ID, default=self.config_entry.data[CONF_SLAVE_ID]): int,
-            vol.Required(CONF_AMOUNT_OF_HEATPUMPS, default=self.config_entry.options.get(CONF_AMOUNT_OF_HEATPUMPS, 1)): int,
-            vol.Required(CONF_AMOUNT_OF_BOILERS, default=self.config_entry.options.get(CONF_AMOUNT_OF_BOILERS, 1)): int,
-            vol.Required(CONF_AMOUNT_OF_BUFFERS, default=self.config_entry.options.get(CONF_AMOUNT_OF_BUFFERS, 1)): int,
-            vol.Required(CONF_AMOUNT_OF_SOLAR, default=self.config_entry.options.get(CONF_AMOUNT_OF_SOLAR, 0)): int,
-            vol.Required(CONF_AMOUNT_OF_HEAT_CIRCUITS, default=self.config_entry.options.get(CONF_AMOUNT_OF_HEAT_CIRCUITS, 1)): int,
+            **{
+                vol.Required(key, default=self.config_entry.data.get(key, MODULE_DEFAULT_COUNTS.get(module, 0))): vol.All(int, vol.Range(min=0, max=MODULE_MAX_INSTANCES[module]))
+                for module, key in MODULE_COUNT_KEYS.items()
+            },
+            vol.Required(CONF_READ_GAP, default=self.config_entry.options.get(CONF_READ_GAP, DEFAULT_READ_GAP)): vol.All(int, vol.Range(min=0, max=50)),
+            vol.Required(CONF_MIN_SCAN_INTERVAL, default=self.config_entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL)): vol.All(int, vol.Range(min=1, max=3600)),
+            vol.Required(CONF_MAX_SCAN_INTERVAL, default=self.config_entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)): vol.All(int, vol.Range(min=1, max=3600)),
+            vol.Required(CONF_INFLIGHT_WINDOW, default=self.config_entry.options.get(CONF_INFLIGHT_WINDOW, DEFAULT_INFLIGHT_WINDOW)): vol.All(int, vol.Range(min=1, max=16)),
+            vol.Optional(CONF_E_MANAGER_SOURCE, description={"suggested_value": self.config_entry.options.get(CONF_E_MANAGER_SOURCE)}): selector.EntitySelector(
+                selector.EntitySelectorConfig(domain="sensor", device_class="power")
+            ),
+            vol.Required(CONF_E_MANAGER_INTERVAL, default=self.config_entry.options.get(CONF_E_MANAGER_INTERVAL, DEFAULT_E_MANAGER_INTERVAL)): vol.All(int, vol.Range(min=1, max=60)),
+            vol.Required(CONF_CAPTURE, default=self.config_entry.options.get(CONF_CAPTURE, False)): bool,
         })
 
-    def test_connection(self, host, port, slave_id):
-        """Test the connection to the Modbus device."""
-        client = ModbusTcpClient(host=host, port=port)
+    async def _async_validate_connection(self, data, unique_id):
+        """Prüft eine geänderte Adresse wie der Einrichtungsdialog und gibt die Fehler für das Formular zurück."""
+        existing = self.hass.config_entries.async_entry_for_domain_unique_id(DOMAIN, unique_id)
+        if existing is not None and existing.entry_id != self.config_entry.entry_id:
+            return {"base": "already_configured"}
         try:
-            if not client.connect():
-                raise ConnectionException("Cannot connect to Modbus client")
-            result = client.read_holding_registers(100, 1, unit=slave_id)
-            if result.isError():
-                raise ValueError("Invalid slave ID")
-        finally:
-            client.close()
\ No newline at end of file
+            await async_discover(self.hass, data[CONF_MODBUS_HOST], data[CONF_MODBUS_PORT], data[CONF_SLAVE_ID])
+        except (ConnectionException, ModbusIOException):
+            return {"base": "cannot_connect"}
+        except ValueError:
+            return {"base": "invalid_slave_id"}
+        return {}
\ No newline at end of file
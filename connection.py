@@ -0,0 +1,285 @@
+"""Gemeinsame Modbus-TCP-Verbindungen je Gateway (Host:Port).
+
+Die Verbindung sendet bis zu `window` Anfragen direkt hintereinander und ordnet
+die Antworten über die Transaction-ID des MBAP-Headers zu. Verhält sich das
+Gerät dabei wiederholt fehlerhaft (Timeout, unbekannte Transaction-ID, "Slave
+Device Busy"), wird auf eine Anfrage zur Zeit zurückgeschaltet und nach einer
+Reihe erfolgreicher Anfragen erneut das konfigurierte Fenster versucht.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import logging
+import struct
+
+from homeassistant.core import HomeAssistant, callback
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+
+from .const import (
+    DATA_CONNECTIONS,
+    DEFAULT_INFLIGHT_WINDOW,
+    INFLIGHT_FALLBACK_THRESHOLD,
+    INFLIGHT_RESTORE_AFTER,
+    INFLIGHT_RESTORE_MAX,
+    MODBUS_RETRIES,
+    MODBUS_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Modbus Function Codes und Exception Codes
+READ_HOLDING_REGISTERS = 0x03
+WRITE_MULTIPLE_REGISTERS = 0x10
+SLAVE_DEVICE_BUSY = 0x06
+
+MBAP_HEADER = struct.Struct(">HHHB")
+
+
+@dataclass
+class ModbusResponse:
+    """Antwort auf eine Modbus-Anfrage, kompatibel zu den pymodbus-Antworten."""
+
+    function_code: int
+    registers: list[int] = field(default_factory=list)
+    exception_code: int | None = None
+
+    def isError(self) -> bool:
+        return self.exception_code is not None
+
+    def __str__(self) -> str:
+        if self.isError():
+            return f"Exception Response({self.function_code | 0x80}, {self.function_code}, code {self.exception_code})"
+        return f"Response({self.function_code}, {len(self.registers)} registers)"
+
+
+def _parse_response(pdu: bytes) -> ModbusResponse:
+    function = pdu[0]
+    if function & 0x80:
+        return ModbusResponse(function & 0x7F, exception_code=pdu[1])
+    if function == READ_HOLDING_REGISTERS:
+        return ModbusResponse(function, list(struct.unpack_from(f">{pdu[1] // 2}H", pdu, 2)))
+    return ModbusResponse(function)
+
+
+class LambdaModbusConnection:
+    """Modbus-TCP-Verbindung, die sich alle Einträge eines Gateways teilen.
+
+    Höchstens `window` Transaktionen sind gleichzeitig offen. Abfragezyklen
+    verschiedener Slave-IDs halten zusätzlich `poll_lock`, sodass sie
+    nacheinander statt verschränkt laufen.
+    """
+
+    def __init__(self, host, port, window=DEFAULT_INFLIGHT_WINDOW, timeout=MODBUS_TIMEOUT, retries=MODBUS_RETRIES):
+        self.host = host
+        self.port = port
+        self.users = 0
+        # Vom jeweiligen Nutzer (Eintrag) konfiguriertes Fenster
+        self.user_windows = {}
+        self.window = max(1, window)
+        self.configured_window = self.window
+        # Fehler paralleler Anfragen in Folge, erfolgreiche Anfragen seit dem Zurückschalten
+        self._parallel_failures = 0
+        self._successes = 0
+        self._restore_after = INFLIGHT_RESTORE_AFTER
+        self.timeout = timeout
+        self.retries = retries
+        self.poll_lock = asyncio.Lock()
+        self._connect_lock = asyncio.Lock()
+        self._slots = asyncio.Condition()
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+        self._pending: dict[int, asyncio.Future] = {}
+        self._transaction_id = 0
+        self._has_connected = False
+        # Zeitüberschreitungen und wiederholte Anfragen aller Nutzer der Verbindung
+        self.timeout_count = 0
+        self.retry_count = 0
+
+    @property
+    def connected(self):
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def async_connect(self):
+        """Baut die Verbindung auf, falls nötig.
+
+        Gibt True zurück, wenn eine zuvor bestehende Verbindung neu aufgebaut wurde.
+        """
+        if self.connected:
+            return False
+        async with self._connect_lock:
+            if self.connected:
+                return False
+            try:
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port), self.timeout
+                )
+            except (OSError, asyncio.TimeoutError) as err:
+                raise ConnectionException(f"Failed to connect to Modbus client {self.host}:{self.port}: {err}")
+            self._read_task = asyncio.get_running_loop().create_task(self._async_read_responses(self._reader))
+            reconnected = self._has_connected
+            self._has_connected = True
+            return reconnected
+
+    async def _async_read_responses(self, reader):
+        """Liest Antworten und ordnet sie über die Transaction-ID den offenen Anfragen zu."""
+        try:
+            while True:
+                header = await reader.readexactly(MBAP_HEADER.size)
+                transaction_id, _, length, _ = MBAP_HEADER.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+                future = self._pending.pop(transaction_id, None)
+                if future is None:
+                    self._fallback(f"unexpected transaction id {transaction_id}")
+                    continue
+                if not future.done():
+                    future.set_result(_parse_response(pdu))
+        except (asyncio.IncompleteReadError, ConnectionError, struct.error, IndexError) as err:
+            _LOGGER.debug(f"Modbus connection {self.host}:{self.port} closed: {err!r}")
+        finally:
+            # Eine inzwischen neu aufgebaute Verbindung bleibt unberührt
+            if self._reader is reader:
+                self._disconnect(ConnectionException(f"Connection to {self.host}:{self.port} lost"))
+
+    def set_configured_window(self, window):
+        """Übernimmt ein neues konfiguriertes Fenster; ein laufender Rückfall auf eine Anfrage bleibt bestehen."""
+        window = max(1, window)
+        if window == self.configured_window:
+            return
+        falling_back = self.window < self.configured_window
+        self.configured_window = window
+        if not falling_back or window == 1:
+            self.window = window
+        _LOGGER.debug(f"Modbus connection {self.host}:{self.port} uses an in-flight window of {window}")
+
+    def _fallback(self, reason):
+        """Zählt einen Fehler paralleler Anfragen und schaltet bei Häufung auf eine Transaktion zur Zeit zurück."""
+        if self.window == 1:
+            return
+        self._parallel_failures += 1
+        if self._parallel_failures < INFLIGHT_FALLBACK_THRESHOLD:
+            _LOGGER.debug(
+                f"Parallel request to {self.host}:{self.port} failed "
+                f"({reason}, {self._parallel_failures}/{INFLIGHT_FALLBACK_THRESHOLD})"
+            )
+            return
+        _LOGGER.warning(
+            f"Modbus device {self.host}:{self.port} does not handle {self.window} parallel requests "
+            f"({reason}); falling back to one request at a time for {self._restore_after} requests"
+        )
+        self.window = 1
+        self._parallel_failures = 0
+        self._successes = 0
+
+    def _record_success(self):
+        """Setzt die Fehlerzählung zurück und versucht nach genügend Erfolgen das konfigurierte Fenster."""
+        self._parallel_failures = 0
+        if self.window >= self.configured_window:
+            return
+        self._successes += 1
+        if self._successes >= self._restore_after:
+            _LOGGER.info(f"Retrying {self.configured_window} parallel requests to {self.host}:{self.port}")
+            self.window = self.configured_window
+            self._restore_after = min(self._restore_after * 2, INFLIGHT_RESTORE_MAX)
+
+    async def _async_transaction(self, slave, pdu: bytes, metrics=None) -> ModbusResponse:
+        """Sendet eine PDU, sobald ein Platz im Fenster frei ist, und wartet auf die Antwort.
+
+        Zeitüberschreitungen und Wiederholungen werden hier gezählt, da intern
+        wiederholte Anfragen den Aufrufer nicht erreichen; mit `metrics`
+        (CoordinatorMetrics) zusätzlich für den aufrufenden Coordinator.
+        """
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retry_count += 1
+                if metrics is not None:
+                    metrics.record_retry()
+            async with self._slots:
+                await self._slots.wait_for(lambda: len(self._pending) < self.window)
+                if not self.connected:
+                    raise ConnectionException(f"Not connected to {self.host}:{self.port}")
+                self._transaction_id = self._transaction_id % 0xFFFF + 1
+                transaction_id = self._transaction_id
+                future = asyncio.get_running_loop().create_future()
+                self._pending[transaction_id] = future
+                parallel = len(self._pending) > 1
+                self._writer.write(MBAP_HEADER.pack(transaction_id, 0, len(pdu) + 1, slave) + pdu)
+            try:
+                response = await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                self.timeout_count += 1
+                if metrics is not None:
+                    metrics.record_timeout()
+                if parallel:
+                    self._fallback("request timed out")
+                continue
+            finally:
+                self._pending.pop(transaction_id, None)
+                async with self._slots:
+                    self._slots.notify_all()
+            if response.exception_code == SLAVE_DEVICE_BUSY and self.window > 1:
+                self._fallback("slave device busy")
+                continue
+            self._record_success()
+            return response
+
+        self._disconnect(ConnectionException(f"Connection to {self.host}:{self.port} reset after timeouts"))
+        raise ModbusIOException(f"No response received after {self.retries} retries")
+
+    async def async_read_holding_registers(self, address, count, slave, metrics=None):
+        return await self._async_transaction(
+            slave, struct.pack(">BHH", READ_HOLDING_REGISTERS, address, count), metrics
+        )
+
+    async def async_write_registers(self, address, values, slave, metrics=None):
+        pdu = struct.pack(f">BHHB{len(values)}H", WRITE_MULTIPLE_REGISTERS, address, len(values), 2 * len(values), *values)
+        return await self._async_transaction(slave, pdu, metrics)
+
+    def _disconnect(self, error):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+
+    def close(self):
+        if self._read_task is not None:
+            self._read_task.cancel()
+            self._read_task = None
+        self._disconnect(ConnectionException(f"Connection to {self.host}:{self.port} closed"))
+
+
+@callback
+def async_get_connection(
+    hass: HomeAssistant, host, port, window=DEFAULT_INFLIGHT_WINDOW, user=None
+) -> LambdaModbusConnection:
+    """Gibt die gemeinsame Verbindung für Host:Port zurück und zählt den Nutzer.
+
+    Die Verbindung verwendet das kleinste Fenster aller Nutzer (`user`, z.B.
+    die entry_id), damit kein Eintrag mehr parallele Anfragen erhält als konfiguriert.
+    """
+    connections = hass.data.setdefault(DATA_CONNECTIONS, {})
+    connection = connections.get((host, port))
+    if connection is None:
+        connection = connections[(host, port)] = LambdaModbusConnection(host, port, window)
+    connection.users += 1
+    connection.user_windows[user] = window
+    connection.set_configured_window(min(connection.user_windows.values()))
+    _LOGGER.debug(f"Modbus connection {host}:{port} used by {connection.users} entries")
+    return connection
+
+
+@callback
+def async_release_connection(hass: HomeAssistant, connection: LambdaModbusConnection, user=None) -> None:
+    """Gibt eine Verbindung frei und schließt sie, wenn sie niemand mehr nutzt."""
+    connection.users -= 1
+    connection.user_windows.pop(user, None)
+    if connection.users > 0:
+        if connection.user_windows:
+            connection.set_configured_window(min(connection.user_windows.values()))
+        return
+    hass.data.get(DATA_CONNECTIONS, {}).pop((connection.host, connection.port), None)
+    connection.close()
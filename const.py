@@ -1,9 +1,20 @@
 import json
+from datetime import timedelta
 from homeassistant.const import CONF_LANGUAGE
 
 
 # Domain
 DOMAIN = "lambda_heatpumps"
+# Gemeinsame Modbus-Verbindungen je Gateway in hass.data
+DATA_CONNECTIONS = f"{DOMAIN}_connections"
+# Geräteinformationen je Konfigurationseintrag in hass.data
+DATA_DEVICE_INFOS = f"{DOMAIN}_device_infos"
+
+# Zwischenspeicher der letzten Registerwerte (homeassistant.helpers.storage)
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.{{entry_id}}"
+# Verzögerung, mit der der Zwischenspeicher nach einer Abfrage geschrieben wird (Sekunden)
+CACHE_SAVE_DELAY = 60
 
 
 # Manufacturer
@@ -20,9 +31,145 @@ CONF_AMOUNT_OF_BUFFERS = "amount_of_buffers"
 CONF_AMOUNT_OF_SOLAR = "amount_of_solar"
 CONF_AMOUNT_OF_HEAT_CIRCUITS = "amount_of_heat_circuits"
 
+CONF_READ_GAP = "read_gap"
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+CONF_INFLIGHT_WINDOW = "inflight_window"
+CONF_E_MANAGER_SOURCE = "e_manager_source"
+CONF_E_MANAGER_INTERVAL = "e_manager_interval"
+CONF_CAPTURE = "capture"
+
 DEFAULT_PORT = 502
 DEFAULT_SLAVE_ID = 1
-
+DEFAULT_READ_GAP = 8
+DEFAULT_MIN_SCAN_INTERVAL = 5
+DEFAULT_MAX_SCAN_INTERVAL = 60
+# Anzahl gleichzeitig offener Modbus-Anfragen; bei Problemen automatisch 1
+DEFAULT_INFLIGHT_WINDOW = 4
+# Nach INFLIGHT_FALLBACK_THRESHOLD Fehlern paralleler Anfragen in Folge wird auf eine
+# Anfrage zur Zeit zurückgeschaltet; nach INFLIGHT_RESTORE_AFTER erfolgreichen
+# Anfragen wird das konfigurierte Fenster erneut versucht (Schwelle verdoppelt sich
+# mit jedem Zurückschalten bis INFLIGHT_RESTORE_MAX)
+INFLIGHT_FALLBACK_THRESHOLD = 3
+INFLIGHT_RESTORE_AFTER = 100
+INFLIGHT_RESTORE_MAX = 6400
+DEFAULT_E_MANAGER_INTERVAL = 2
+
+# Modbus
+# Maximale Anzahl Register pro Leseanfrage (Function Code 3)
+MODBUS_MAX_READ_REGISTERS = 125
+# Maximale Anzahl Register pro Schreibanfrage (Function Code 16)
+MODBUS_MAX_WRITE_REGISTERS = 123
+# Timeout je Anfrage in Sekunden und Anzahl der Wiederholungen
+MODBUS_TIMEOUT = 3
+MODBUS_RETRIES = 3
+# Exception Code für nicht vorhandene Registeradressen
+MODBUS_ILLEGAL_DATA_ADDRESS = 2
+
+# Register, die UNSUPPORTED_THRESHOLD-mal hintereinander mit "Illegal Data Address"
+# beantwortet wurden, werden nicht mehr abgefragt und nur alle
+# UNSUPPORTED_REPROBE_INTERVAL erneut geprüft
+UNSUPPORTED_THRESHOLD = 3
+UNSUPPORTED_REPROBE_INTERVAL = timedelta(hours=6)
+
+# Zeitfenster, in dem Schreibzugriffe gesammelt und zusammengefasst werden
+WRITE_DEBOUNCE_SECONDS = 0.5
+# Zeitfenster, in dem neu angemeldete Register gesammelt und gezielt gelesen werden
+NEW_REGISTER_READ_DELAY = 0.5
+
+# E-Manager: PV-Überschuss wird in das Register "actual power input" geschrieben,
+# Leistungsaufnahme und Sollwert werden im selben Transaktionsfenster gelesen
+E_MANAGER_POWER_INPUT_REGISTER = 102
+E_MANAGER_READ_BACK_REGISTERS = (102, 103, 104)
+# Unveränderte Werte werden spätestens nach dieser Zeit erneut geschrieben
+E_MANAGER_KEEPALIVE = timedelta(seconds=60)
+
+# Aufzeichnung des Modbus-Verkehrs (NDJSON im Konfigurationsverzeichnis)
+# - die Datei wird ab CAPTURE_MAX_BYTES rotiert, CAPTURE_BACKUPS ältere Dateien bleiben erhalten
+# - gepuffert und spätestens nach CAPTURE_FLUSH_DELAY Sekunden oder CAPTURE_FLUSH_LINES Zeilen geschrieben
+CAPTURE_FILENAME = f"{DOMAIN}_capture_{{entry_id}}.ndjson"
+CAPTURE_MAX_BYTES = 5 * 1024 * 1024
+CAPTURE_BACKUPS = 3
+CAPTURE_FLUSH_DELAY = 10
+CAPTURE_FLUSH_LINES = 500
+
+# Circuit Breaker für nicht erreichbare Steuerungen
+# - nach BREAKER_FAILURE_THRESHOLD fehlgeschlagenen Zyklen wird nicht mehr abgefragt
+# - Wartezeit verdoppelt sich ab BREAKER_BASE_BACKOFF bis BREAKER_MAX_BACKOFF (Sekunden)
+# - danach prüft eine einzelne Leseanfrage auf BREAKER_PROBE_REGISTER die Erreichbarkeit
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_BASE_BACKOFF = 10
+BREAKER_MAX_BACKOFF = 600
+BREAKER_JITTER = 0.2
+BREAKER_PROBE_REGISTER = 100
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+# Wortreihenfolge für 32-Bit-Werte (Lambda: höherwertiges Wort zuerst)
+WORD_ORDER_BIG = "big"
+WORD_ORDER_LITTLE = "little"
+
+# Polling-Stufen
+# - fast: schnell veränderliche Werte (z.B. Leistungen)
+# - normal: Standardintervall des Coordinators
+# - slow: selten veränderliche Werte (Fehlernummern, Einstellungen)
+# - once: nur einmal nach dem Start gelesen
+POLL_TIER_FAST = "fast"
+POLL_TIER_NORMAL = "normal"
+POLL_TIER_SLOW = "slow"
+POLL_TIER_ONCE = "once"
+
+# Reihenfolge von schnell nach langsam
+POLL_TIERS = (POLL_TIER_FAST, POLL_TIER_NORMAL, POLL_TIER_SLOW, POLL_TIER_ONCE)
+
+DEFAULT_POLL_INTERVALS = {
+    POLL_TIER_FAST: timedelta(seconds=5),
+    POLL_TIER_NORMAL: timedelta(seconds=10),
+    POLL_TIER_SLOW: timedelta(minutes=5),
+}
+
+
+
+# Adaptive Abfrage anhand des Wärmepumpenzustands (Register 1002/1003 je Wärmepumpe)
+HP_STATE_REGISTER = 1002
+HP_OPERATING_STATE_REGISTER = 1003
+# START COMPRESSOR, REGULATION, DEFROSTING
+HP_ACTIVE_STATES = (5, 7, 10)
+# STBY, OFF, SUMMER
+HP_IDLE_OPERATING_STATES = (0, 6, 10)
+
+# Modulinstanzen: Basisadresse des Moduls + MODULE_STRIDE * (Nr - 1)
+MODULE_STRIDE = 100
+MODULE_MAX_INSTANCES = {
+    "heatpump": 3,
+    "boiler": 5,
+    "buffer": 5,
+    "solar": 2,
+    "heatingcircuit": 12,
+}
+# Konfigurationsschlüssel für die Anzahl der Instanzen je Modul
+MODULE_COUNT_KEYS = {
+    "heatpump": CONF_AMOUNT_OF_HEATPUMPS,
+    "boiler": CONF_AMOUNT_OF_BOILERS,
+    "buffer": CONF_AMOUNT_OF_BUFFERS,
+    "solar": CONF_AMOUNT_OF_SOLAR,
+    "heatingcircuit": CONF_AMOUNT_OF_HEAT_CIRCUITS,
+}
+# Anzahl je Modul, falls der Eintrag keine Angabe enthält
+MODULE_DEFAULT_COUNTS = {"heatpump": 1, "heatingcircuit": 1}
+# Geräte ohne Modulnummer
+SINGLE_DEVICES = ("general_ambient", "e_manager")
+# Basisadresse der ersten Instanz je Modul
+MODULE_BASE_REGISTERS = {
+    "heatpump": 1000,
+    "boiler": 2000,
+    "buffer": 3000,
+    "solar": 4000,
+    "heatingcircuit": 5000,
+}
+# Bei der Erkennung gelesene Register je Instanz (Fehlernummer und Betriebszustand)
+MODULE_PROBE_COUNT = 2
 
 
 # Register definitions
@@ -1,20 +1,106 @@
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from pymodbus.exceptions import ConnectionException
-from pymodbus.client import ModbusTcpClient
-from pymodbus.payload import BinaryPayloadDecoder, BinaryPayloadBuilder
-from pymodbus.constants import Endian
+from homeassistant.util import dt as dt_util
+from pymodbus.exceptions import ConnectionException, ModbusIOException
 from datetime import timedelta
+import asyncio
 import logging
+import math
+import random
+import struct
+import time
+
+from .const import (
+    BREAKER_BASE_BACKOFF,
+    BREAKER_CLOSED,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_HALF_OPEN,
+    BREAKER_JITTER,
+    BREAKER_MAX_BACKOFF,
+    BREAKER_OPEN,
+    BREAKER_PROBE_REGISTER,
+    CACHE_SAVE_DELAY,
+    DEFAULT_READ_GAP,
+    DEFAULT_POLL_INTERVALS,
+    HP_ACTIVE_STATES,
+    HP_IDLE_OPERATING_STATES,
+    HP_OPERATING_STATE_REGISTER,
+    HP_STATE_REGISTER,
+    MODULE_MAX_INSTANCES,
+    MODBUS_ILLEGAL_DATA_ADDRESS,
+    NEW_REGISTER_READ_DELAY,
+    MODULE_STRIDE,
+    POLL_TIERS,
+    POLL_TIER_NORMAL,
+    POLL_TIER_ONCE,
+    STORAGE_VERSION,
+    UNSUPPORTED_REPROBE_INTERVAL,
+    UNSUPPORTED_THRESHOLD,
+    WORD_ORDER_BIG,
+    WRITE_DEBOUNCE_SECONDS,
+)
+from .connection import READ_HOLDING_REGISTERS, WRITE_MULTIPLE_REGISTERS, LambdaModbusConnection
+from .metrics import CoordinatorMetrics
+from .registers import RegisterStore, RegisterSubscription
+from .planner import REGISTER_FORMATS, build_read_plan, build_write_plan, compile_block, convert_value, encode_value, register_size
 
 _LOGGER = logging.getLogger(__name__)
 
 class LambdaHeatpumpCoordinator(DataUpdateCoordinator):
-    def __init__(self, hass, host, port, slave_id, update_interval=timedelta(seconds=10)):
+    def __init__(self, hass, host, port, slave_id, update_interval=timedelta(seconds=10), read_gap=DEFAULT_READ_GAP, poll_intervals=None, word_order=WORD_ORDER_BIG, min_interval=None, max_interval=None, connection=None, cache_key=None):
         self.host = host
         self.port = port
         self.slave_id = slave_id
+        self.read_gap = read_gap
+        self.word_order = word_order
+        # Intervalle je Polling-Stufe; "normal" entspricht dem update_interval
+        self.poll_intervals = {**DEFAULT_POLL_INTERVALS, POLL_TIER_NORMAL: update_interval, **(poll_intervals or {})}
+        # Grenzen der adaptiven Abfrage; ohne Grenzen bleibt das Intervall fest
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._default_interval = self.poll_intervals[POLL_TIER_NORMAL]
+        # Angemeldete Register -> aktive Anmeldungen; daraus ergeben sich
+        # Typ (_registers_to_read) und Polling-Stufe (_register_tiers) der Abfrage
+        self._subscriptions = {}
         self._registers_to_read = {}
-        self._client = None
+        self._register_tiers = {}
+        self._tier_last_poll = {}
+        self._read_plans = {}
+        # Nicht unterstützte Register -> Zeitpunkt (Unix-Zeit) der letzten Prüfung,
+        # sowie aufeinanderfolgende "Illegal Data Address"-Antworten je Register
+        self._unsupported = {}
+        self._illegal_counts = {}
+        # Lücken (Start, Ende) zwischen lesbaren Registern, die kein Block überspannen
+        # darf -> Zeitpunkt (Unix-Zeit) der Erkennung
+        self._unreadable_gaps = {}
+        # Registerwerte; `data` zeigt nach der ersten Abfrage auf diesen Speicher
+        self.registers = RegisterStore()
+        # Gemeinsame Verbindung zum Gateway; ohne Vorgabe eine eigene
+        self._owns_connection = connection is None
+        self.connection = connection or LambdaModbusConnection(host, port)
+        self.metrics = CoordinatorMetrics()
+        # Register, deren Wert sich im letzten Zyklus geändert hat
+        self._changed_registers = set()
+        self._notified_update_success = None
+        # Ausstehende Schreibzugriffe: Register -> (Wert, Typ, wartende Futures)
+        self._pending_writes = {}
+        self._write_lock = asyncio.Lock()
+        self._unsub_write_flush = None
+        # Nach der ersten Abfrage angemeldete Register, die gesammelt gezielt gelesen werden
+        self._new_registers = set()
+        self._unsub_new_register_read = None
+        # Circuit Breaker: Zustand, aufeinanderfolgende Fehler, nächster Versuch (monotonic)
+        self.breaker_state = BREAKER_CLOSED
+        self._breaker_failures = 0
+        self._breaker_retry_at = 0.0
+        # Zwischenspeicher der letzten Werte; restored_at ist gesetzt, solange
+        # noch keine Live-Abfrage gelungen ist
+        self._store = Store(hass, STORAGE_VERSION, cache_key) if cache_key else None
+        self.restored_at = None
+        # Optionale Aufzeichnung des Modbus-Verkehrs (capture.TrafficCapture)
+        self.capture = None
 
         _LOGGER.debug(f"Initializing Coordinator: Host={self.host}, Port={self.port}, Slave ID={self.slave_id}")
 
@@ -29,105 +115,746 @@ class LambdaHeatpumpCoordinator(DataUpdateCoordinator):
             update_interval=update_interval,
         )
 
-    def add_register(self, register, register_type='int16'):
-        self._registers_to_read[register] = register_type
-    
-    def remove_register(self, register):
-        self._registers_to_read.pop(register, None)
+    def add_register(self, register, register_type='int16', poll_tier=POLL_TIER_NORMAL):
+        """Meldet ein Register zur Abfrage an und gibt die Anmeldung zurück.
+
+        Mehrere Entitäten können dasselbe Register anmelden; abgefragt wird es,
+        bis die letzte Anmeldung mit `remove_register` zurückgegeben wurde.
+        """
+        subscription = RegisterSubscription(register, register_type, poll_tier, self.registers.slot(register))
+        if register_type not in REGISTER_FORMATS:
+            _LOGGER.error(f"Unbekannter Registertyp {register_type} für Register {register}")
+            return subscription
+        subscriptions = self._subscriptions.setdefault(register, [])
+        subscriptions.append(subscription)
+        if len(subscriptions) == 1:
+            self._schedule_new_register_read(register)
+        self._update_subscription(register)
+        return subscription
+
+    def remove_register(self, subscription):
+        """Gibt eine Anmeldung zurück; ohne weitere Anmeldungen wird das Register nicht mehr abgefragt."""
+        if subscription is None:
+            return
+        subscriptions = self._subscriptions.get(subscription.register, [])
+        if subscription not in subscriptions:
+            return
+        subscriptions.remove(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.register]
+            self._new_registers.discard(subscription.register)
+        self._update_subscription(subscription.register)
+
+    def value(self, subscription):
+        """Wert einer Anmeldung in ihrem eigenen Datentyp oder None."""
+        if subscription is None:
+            return None
+        value = self.registers.value(subscription.slot)
+        register_type = self._registers_to_read.get(subscription.register, subscription.register_type)
+        if value is None or register_type == subscription.register_type:
+            return value
+        try:
+            return convert_value(value, register_type, subscription.register_type, self.word_order)
+        except (struct.error, ValueError):
+            return None
+
+    def _update_subscription(self, register):
+        """Leitet Typ und Polling-Stufe eines Registers aus seinen Anmeldungen ab.
+
+        Lesepläne werden nur verworfen, wenn sich Typ oder Stufe tatsächlich
+        ändern, und nur für die betroffenen Stufen.
+        """
+        previous = (self._registers_to_read.get(register), self._register_tiers.get(register))
+        subscriptions = self._subscriptions.get(register)
+        if subscriptions:
+            # Gelesen wird mit dem längsten angemeldeten Typ, bei gleicher Länge dem ersten;
+            # es gilt die schnellste Stufe
+            current = (
+                max((item.register_type for item in subscriptions), key=register_size),
+                min((item.poll_tier for item in subscriptions), key=POLL_TIERS.index),
+            )
+            self._registers_to_read[register], self._register_tiers[register] = current
+        else:
+            current = (None, None)
+            self._registers_to_read.pop(register, None)
+            self._register_tiers.pop(register, None)
+        if current == previous:
+            return
+
+        tiers = {tier for _, tier in (previous, current) if tier is not None}
+        for key in [key for key in self._read_plans if not key.isdisjoint(tiers)]:
+            del self._read_plans[key]
+        if current[1] is not None:
+            # Neue Register werden im nächsten Zyklus ihrer Stufe gelesen
+            self._tier_last_poll.pop(current[1], None)
+        if current[1] != previous[1]:
+            self._update_tick_interval()
+
+    @callback
+    def _schedule_new_register_read(self, register):
+        """Liest ein nachträglich angemeldetes Register zeitnah, ohne auf den nächsten Zyklus zu warten."""
+        # Vor der ersten Live-Abfrage liest diese ohnehin alle Register
+        if self.data is None or self.restored_at is not None:
+            return
+        self._new_registers.add(register)
+        if self._unsub_new_register_read is None:
+            self._unsub_new_register_read = async_call_later(
+                self.hass, NEW_REGISTER_READ_DELAY, self._async_handle_new_register_timer
+            )
+
+    async def _async_handle_new_register_timer(self, _now):
+        self._unsub_new_register_read = None
+        registers, self._new_registers = self._new_registers, set()
+        if not registers or self.breaker_state == BREAKER_OPEN:
+            return
+        try:
+            await self.async_refresh_registers(registers)
+        except (ConnectionException, ModbusIOException, asyncio.TimeoutError) as err:
+            _LOGGER.debug(f"Error reading newly added registers {sorted(registers)}: {err}")
 
     def clear_registers(self):
+        self._subscriptions.clear()
+        self._new_registers.clear()
         self._registers_to_read.clear()
+        self._register_tiers.clear()
+        self._read_plans.clear()
+        self._update_tick_interval()
+
+    def _update_tick_interval(self):
+        """Setzt das Coordinator-Intervall auf die schnellste verwendete Polling-Stufe."""
+        intervals = [
+            self.poll_intervals[tier]
+            for tier in set(self._register_tiers.values())
+            if tier in self.poll_intervals
+        ]
+        self.update_interval = min(intervals, default=self.poll_intervals[POLL_TIER_NORMAL])
+
+    def _due_tiers(self, now):
+        """Ermittelt die Polling-Stufen, die in diesem Zyklus gelesen werden müssen."""
+        # Toleranz, damit ein minimal zu früh ausgelöster Zyklus die Stufe nicht verpasst
+        tolerance = self.update_interval.total_seconds() / 2
+        due = set()
+        for tier in set(self._register_tiers.values()):
+            last_poll = self._tier_last_poll.get(tier)
+            if last_poll is None:
+                due.add(tier)
+                continue
+            interval = self.poll_intervals.get(tier)
+            if interval is not None and now - last_poll >= interval.total_seconds() - tolerance:
+                due.add(tier)
+        return frozenset(due)
+
+    def _adapt_interval(self, data):
+        """Passt das normale Abfrageintervall an den Zustand der Wärmepumpen an.
+
+        Läuft eine Wärmepumpe (Verdichterstart, Regelung, Abtauen), wird mit
+        `min_interval` abgefragt; stehen alle Wärmepumpen (Standby, Aus, Sommer),
+        mit `max_interval`. Die Stufen "fast" und "slow" bleiben unverändert.
+        """
+        if self.min_interval is None or self.max_interval is None:
+            return
+
+        states = []
+        for instance in range(MODULE_MAX_INSTANCES["heatpump"]):
+            offset = MODULE_STRIDE * instance
+            state = data.get_register(HP_STATE_REGISTER + offset)
+            operating_state = data.get_register(HP_OPERATING_STATE_REGISTER + offset)
+            if state is not None or operating_state is not None:
+                states.append((state, operating_state))
+
+        if any(state in HP_ACTIVE_STATES for state, _ in states):
+            interval = self.min_interval
+        elif states and all(operating_state in HP_IDLE_OPERATING_STATES for _, operating_state in states):
+            interval = self.max_interval
+        else:
+            interval = min(max(self._default_interval, self.min_interval), self.max_interval)
+
+        if interval != self.poll_intervals[POLL_TIER_NORMAL]:
+            _LOGGER.debug(f"Adaptive polling: normal interval {interval.total_seconds()} s (heat pump states {states})")
+            self.poll_intervals[POLL_TIER_NORMAL] = interval
+            self._update_tick_interval()
+
+    def _get_read_plan(self, tiers):
+        """Gibt den zwischengespeicherten Leseplan für die Polling-Stufen zurück und baut ihn bei Bedarf neu auf."""
+        read_plan = self._read_plans.get(tiers)
+        if read_plan is None:
+            registers = {
+                register: register_type
+                for register, register_type in self._registers_to_read.items()
+                if self._register_tiers[register] in tiers and register not in self._unsupported
+            }
+            read_plan = self._read_plans[tiers] = build_read_plan(
+                registers, self.read_gap, word_order=self.word_order, unreadable=self._unreadable_gaps
+            )
+            _LOGGER.debug(
+                f"Read plan for {sorted(tiers)}: {len(registers)} registers in {len(read_plan)} blocks "
+                f"{[(block.address, block.end) for block in read_plan]}"
+            )
+        return read_plan
 
     async def _async_update_data(self):
+        cycle_start = time.monotonic()
+        cycle_ok = False
+        if self.breaker_state == BREAKER_OPEN and cycle_start < self._breaker_retry_at:
+            # Schnelles Fehlschlagen ohne Verbindungsversuch und ohne Logeinträge;
+            # zählt nicht als Zyklus, damit Dauer und Auslastung erhalten bleiben
+            self.metrics.record_skipped_cycle()
+            raise UpdateFailed(
+                f"Controller {self.host}:{self.port} unreachable, "
+                f"next attempt in {self._breaker_retry_at - cycle_start:.0f} s"
+            )
         try:
-            if not self._client or not self._client.is_socket_open():
-                self._client = ModbusTcpClient(self.host, self.port)
-                if not await self.hass.async_add_executor_job(self._client.connect):
-                    raise UpdateFailed(f"Failed to connect to Modbus client {self.host}:{self.port}")
-
-            data = {}
-
-            for register, register_type in self._registers_to_read.items():
-                try:
-                    result = await self.hass.async_add_executor_job(
-                        self._read_register,
-                        register,
-                        2 if register_type in ['int32', 'float32'] else 1
-                    )
-                    if result.isError():
-                        _LOGGER.error(f"Error reading register {register}: {result}")
-                        data[f"register_{register}"] = None
-                    else:
-                        decoder = BinaryPayloadDecoder.fromRegisters(result.registers, byteorder=Endian.Big)
-                        value = self._decode_value(decoder, register_type)
-                        data[f"register_{register}"] = value
-                        _LOGGER.debug(f"Register {register} read: {value}")
-                except Exception as e:
-                    _LOGGER.error(f"Error reading register {register}: {e}")
-                    data[f"register_{register}"] = None
+            if self.breaker_state == BREAKER_OPEN:
+                self.breaker_state = BREAKER_HALF_OPEN
+                await self._async_probe()
 
+            await self._async_connect()
+
+            # Zyklen anderer Slave-IDs am selben Gateway laufen nacheinander
+            async with self.connection.poll_lock:
+                now = time.monotonic()
+                due_tiers = self._due_tiers(now)
+                # Werte nicht fälliger Stufen bleiben aus dem letzten Zyklus erhalten
+                data = self.registers
+                self._changed_registers = set()
+
+                # Alle Blöcke werden gleichzeitig angefragt; die Verbindung begrenzt
+                # die Anzahl offener Transaktionen auf ihr Fenster
+                read_plan = self._get_read_plan(due_tiers)
+                results = await asyncio.gather(
+                    *(self._async_read_block(block, cycle=True) for block in read_plan),
+                    self._async_reprobe_unsupported(),
+                )
+                # Neu angemeldete Register, die dieser Zyklus gelesen hat, nicht noch einmal gezielt lesen
+                self._new_registers.difference_update(
+                    register for block in read_plan for register, _ in block.registers
+                )
+                for values in results:
+                    for register, value in values:
+                        self._store_value(data, register, value)
+
+            for tier in due_tiers:
+                # "once"-Register so lange lesen, bis alle einen Wert geliefert haben
+                if tier == POLL_TIER_ONCE and any(
+                    data.get_register(register) is None
+                    for register, register_tier in self._register_tiers.items()
+                    if register_tier == POLL_TIER_ONCE and register not in self._unsupported
+                ):
+                    continue
+                self._tier_last_poll[tier] = now
+
+            self._adapt_interval(data)
+            self._breaker_success()
+            if self.restored_at is not None:
+                # Alle Entitäten aktualisieren, damit die Kennzeichnung der gespeicherten Werte verschwindet
+                self._changed_registers.update(self._registers_to_read)
+                self.restored_at = None
+            if self._store is not None:
+                self._store.async_delay_save(self._cache_data, CACHE_SAVE_DELAY)
+            cycle_ok = True
             return data
-        except ConnectionException as conn_err:
-            _LOGGER.error(f"Connection error: {conn_err}")
+        except UpdateFailed:
+            raise
+        except (ConnectionException, ModbusIOException, asyncio.TimeoutError) as conn_err:
+            self._breaker_failure(conn_err)
             raise UpdateFailed(f"Connection error: {conn_err}")
         except Exception as err:
             _LOGGER.exception(f"Error fetching data: {err}")
             raise UpdateFailed(f"Error fetching data: {err}")
+        finally:
+            interval = self.update_interval.total_seconds() if self.update_interval else None
+            self.metrics.record_cycle(time.monotonic() - cycle_start, interval, cycle_ok)
     
-    def _read_register(self, register, count):
-        return self._client.read_holding_registers(register, count, unit=self.slave_id)
-
-    def _decode_value(self, decoder, register_type):
-        if register_type == 'int16':
-            return decoder.decode_16bit_int()
-        elif register_type == 'uint16':
-            return decoder.decode_16bit_uint()
-        elif register_type == 'int32':
-            return decoder.decode_32bit_int()
-        elif register_type == 'float32':
-            return decoder.decode_32bit_float()
+    async def async_restore_cache(self):
+        """Übernimmt die zuletzt gespeicherten Registerwerte als Startwerte.
+
+        Gibt True zurück, wenn Werte wiederhergestellt wurden.
+        """
+        if self._store is None:
+            return False
+        cache = await self._store.async_load()
+        if not cache:
+            return False
+        self._unsupported = {int(register): since for register, since in cache.get("unsupported", {}).items()}
+        self._unreadable_gaps = {(start, end): since for start, end, since in cache.get("unreadable_gaps", [])}
+        if not cache.get("data"):
+            return False
+        self.registers.restore(cache["data"])
+        self.data = self.registers
+        self.restored_at = dt_util.parse_datetime(cache["saved_at"])
+        _LOGGER.debug(f"Restored {len(self.data)} cached register values from {self.restored_at}")
+        return True
+
+    @callback
+    def _cache_data(self):
+        return {
+            "saved_at": dt_util.utcnow().isoformat(),
+            "data": dict(self.registers),
+            "unsupported": self._unsupported,
+            "unreadable_gaps": [[start, end, since] for (start, end), since in self._unreadable_gaps.items()],
+        }
+
+    async def _async_probe(self):
+        """Prüft mit einer einzelnen Leseanfrage, ob die Steuerung wieder erreichbar ist."""
+        _LOGGER.debug(f"Probing controller {self.host}:{self.port} (slave {self.slave_id})")
+        await self._async_connect()
+        # Auch eine Exception-Antwort zeigt, dass die Steuerung antwortet
+        await self._read_register(BREAKER_PROBE_REGISTER, 1, cycle=True)
+
+    def _breaker_failure(self, err):
+        """Zählt einen fehlgeschlagenen Zyklus und öffnet den Circuit Breaker bei Bedarf."""
+        self._breaker_failures += 1
+        if self.breaker_state == BREAKER_CLOSED and self._breaker_failures < BREAKER_FAILURE_THRESHOLD:
+            _LOGGER.debug(f"Connection error ({self._breaker_failures}/{BREAKER_FAILURE_THRESHOLD}): {err}")
+            return
+        exponent = max(0, self._breaker_failures - BREAKER_FAILURE_THRESHOLD)
+        backoff = min(BREAKER_BASE_BACKOFF * 2 ** exponent, BREAKER_MAX_BACKOFF)
+        backoff *= random.uniform(1 - BREAKER_JITTER, 1 + BREAKER_JITTER)
+        self._breaker_retry_at = time.monotonic() + backoff
+        if self.breaker_state == BREAKER_CLOSED:
+            _LOGGER.warning(
+                f"Controller {self.host}:{self.port} (slave {self.slave_id}) unreachable: {err}; "
+                f"pausing requests, next attempt in {backoff:.0f} s"
+            )
         else:
-            _LOGGER.error(f"Unbekannter Registertyp {register_type}")
+            _LOGGER.debug(f"Controller {self.host}:{self.port} still unreachable, next attempt in {backoff:.0f} s")
+        self.breaker_state = BREAKER_OPEN
+
+    def _breaker_success(self):
+        if self.breaker_state != BREAKER_CLOSED:
+            _LOGGER.info(f"Controller {self.host}:{self.port} (slave {self.slave_id}) reachable again")
+        self.breaker_state = BREAKER_CLOSED
+        self._breaker_failures = 0
+
+    def _store_value(self, data, register, value):
+        """Speichert einen Registerwert und merkt sich Änderungen für die Listener."""
+        if data.set(register, value):
+            self._changed_registers.add(register)
+
+    @callback
+    def async_update_listeners(self):
+        """Benachrichtigt nur die Entitäten, deren Register sich geändert haben.
+
+        Entitäten übergeben ihre Register als Listener-Kontext. Listener ohne
+        Kontext sowie Wechsel der Verfügbarkeit werden immer benachrichtigt.
+        """
+        if not self.last_update_success or self.last_update_success != self._notified_update_success:
+            self._notified_update_success = self.last_update_success
+            super().async_update_listeners()
+            return
+
+        changed = self._changed_registers
+        for update_callback, registers in list(self._listeners.values()):
+            if registers is None or not changed.isdisjoint(registers):
+                update_callback()
+
+    async def _async_read_block(self, block, cycle=False):
+        """Liest einen Block und gibt (Register, Wert) für alle enthaltenen Register zurück."""
+        try:
+            result = await self._read_register(block.address, block.count, cycle)
+            if result.isError():
+                # Einzeln nachlesen, damit ein ungültiges Register nicht den ganzen Block verwirft
+                if getattr(result, "exception_code", None) == MODBUS_ILLEGAL_DATA_ADDRESS:
+                    _LOGGER.debug(f"Illegal data address in registers {block.address}-{block.end}, reading them one by one")
+                else:
+                    _LOGGER.error(f"Error reading registers {block.address}-{block.end}: {result}")
+                values = [
+                    (register, await self._async_read_single(register, register_type, cycle))
+                    for register, register_type in block.registers
+                ]
+                if getattr(result, "exception_code", None) == MODBUS_ILLEGAL_DATA_ADDRESS and all(
+                    value is not None for _, value in values
+                ):
+                    self._record_unreadable_gaps(block)
+                return values
+            return list(zip((register for register, _ in block.registers), block.decode(result.registers)))
+        except (ConnectionException, ModbusIOException, asyncio.TimeoutError):
+            # Transportfehler beenden den Zyklus statt jedes Register einzeln zu melden
+            raise
+        except Exception as e:
+            _LOGGER.error(f"Error reading registers {block.address}-{block.end}: {e}")
+            return [(register, None) for register, _ in block.registers]
+
+    async def _async_read_single(self, register, register_type, cycle=False):
+        """Liest ein einzelnes Register und gibt den dekodierten Wert zurück."""
+        try:
+            result = await self._read_register(register, register_size(register_type), cycle)
+            if result.isError():
+                if getattr(result, "exception_code", None) == MODBUS_ILLEGAL_DATA_ADDRESS:
+                    self._record_illegal_address(register)
+                else:
+                    _LOGGER.error(f"Error reading register {register}: {result}")
+                return None
+            self._illegal_counts.pop(register, None)
+            if self._unsupported.pop(register, None) is not None:
+                _LOGGER.info(f"Register {register} is available again")
+                self._read_plans.clear()
+            block = compile_block(register, register_size(register_type), ((register, register_type),), self.word_order)
+            return block.decode(result.registers)[0]
+        except (ConnectionException, ModbusIOException, asyncio.TimeoutError):
+            raise
+        except Exception as e:
+            _LOGGER.error(f"Error reading register {register}: {e}")
             return None
 
+    def _record_illegal_address(self, register):
+        """Zählt "Illegal Data Address"-Antworten und nimmt das Register bei Bedarf aus dem Leseplan."""
+        if register in self._unsupported:
+            return
+        count = self._illegal_counts[register] = self._illegal_counts.get(register, 0) + 1
+        if count < UNSUPPORTED_THRESHOLD:
+            _LOGGER.debug(f"Register {register} returned illegal data address ({count}/{UNSUPPORTED_THRESHOLD})")
+            return
+        _LOGGER.warning(
+            f"Register {register} is not supported by the controller; "
+            f"it is skipped and checked again every {UNSUPPORTED_REPROBE_INTERVAL}"
+        )
+        del self._illegal_counts[register]
+        self._unsupported[register] = time.time()
+        self._read_plans.clear()
+
+    def _record_unreadable_gaps(self, block):
+        """Merkt sich die Lücken eines Blocks, dessen Register einzeln lesbar sind, der als Ganzes aber nicht.
+
+        Die ungültige Adresse liegt dann in einer der Lücken; Lesepläne
+        teilen Blöcke künftig dort. Ohne Lücke wird an den Registergrenzen geteilt.
+        """
+        boundaries = [
+            (register + register_size(register_type), next_register)
+            for (register, register_type), (next_register, _) in zip(block.registers, block.registers[1:])
+        ]
+        gaps = [(start, end) for start, end in boundaries if start < end] or boundaries
+        if not gaps:
+            return
+        now = time.time()
+        for gap in gaps:
+            self._unreadable_gaps[gap] = now
+        _LOGGER.debug(
+            f"Block {block.address}-{block.end} returned illegal data address although all registers "
+            f"are readable; splitting read blocks at {gaps} for {UNSUPPORTED_REPROBE_INTERVAL}"
+        )
+        self._read_plans.clear()
+
+    async def _async_reprobe_unsupported(self):
+        """Liest nicht unterstützte Register nach Ablauf des Prüfintervalls erneut.
+
+        Gemerkte Lücken verfallen nach demselben Intervall, sodass der nächste
+        Zyklus die Blöcke wieder zusammenhängend liest.
+        """
+        now = time.time()
+        expired = [
+            gap
+            for gap, checked in self._unreadable_gaps.items()
+            if now - checked >= UNSUPPORTED_REPROBE_INTERVAL.total_seconds()
+        ]
+        for gap in expired:
+            del self._unreadable_gaps[gap]
+        if expired:
+            self._read_plans.clear()
+        due = [
+            register
+            for register, checked in self._unsupported.items()
+            if register in self._registers_to_read
+            and now - checked >= UNSUPPORTED_REPROBE_INTERVAL.total_seconds()
+        ]
+        for register in due:
+            self._unsupported[register] = now
+        values = await asyncio.gather(
+            *(self._async_read_single(register, self._registers_to_read[register], cycle=True) for register in due)
+        )
+        return [(register, value) for register, value in zip(due, values) if value is not None]
+
+    async def _async_connect(self):
+        """Baut die (gemeinsame) Verbindung zum Modbus-Client auf, falls sie nicht besteht."""
+        if await self.connection.async_connect():
+            self.metrics.record_reconnect()
+
+    async def _read_register(self, register, count, cycle=False):
+        """Liest Register; `cycle` zählt die Anfrage zum laufenden Abfragezyklus."""
+        start = time.monotonic()
+        try:
+            # Zeitüberschreitungen und Wiederholungen zählt die Verbindung
+            result = await self.connection.async_read_holding_registers(register, count, self.slave_id, self.metrics)
+        except Exception as err:
+            self.metrics.record_read(count, time.monotonic() - start, False, cycle)
+            self._capture(READ_HOLDING_REGISTERS, register, count, start, error=err)
+            raise
+        self.metrics.record_read(count, time.monotonic() - start, not result.isError(), cycle)
+        self._capture(READ_HOLDING_REGISTERS, register, count, start, result)
+        return result
+
+    def _capture(self, function, address, request, start, response=None, error=None):
+        if self.capture is not None:
+            self.capture.record(self.slave_id, function, address, request, time.monotonic() - start, response, error)
+
+    def capture_header(self):
+        """Kopfzeile einer Aufzeichnung: angemeldete Register mit Typ und Polling-Stufe."""
+        return {
+            "slave": self.slave_id,
+            "word_order": self.word_order,
+            "read_gap": self.read_gap,
+            "registers": {
+                str(register): [register_type, self._register_tiers.get(register, POLL_TIER_NORMAL)]
+                for register, register_type in self._registers_to_read.items()
+            },
+        }
+
+    def diagnostics(self):
+        """Zustand des Coordinators für den Diagnose-Download."""
+        return {
+            "slave_id": self.slave_id,
+            "update_interval": self.update_interval.total_seconds() if self.update_interval else None,
+            "poll_intervals": {tier: interval.total_seconds() for tier, interval in self.poll_intervals.items()},
+            "adaptive_interval_bounds": (
+                [self.min_interval.total_seconds(), self.max_interval.total_seconds()]
+                if self.min_interval is not None and self.max_interval is not None
+                else None
+            ),
+            "read_gap": self.read_gap,
+            "word_order": self.word_order,
+            "registers": len(self._registers_to_read),
+            "subscriptions": sum(len(subscriptions) for subscriptions in self._subscriptions.values()),
+            "unsupported_registers": sorted(self._unsupported),
+            "unreadable_gaps": sorted(self._unreadable_gaps),
+            "read_plans": {
+                ",".join(sorted(tiers)): [(block.address, block.count) for block in read_plan]
+                for tiers, read_plan in self._read_plans.items()
+            },
+            "connection": {
+                "users": self.connection.users,
+                "inflight_window": self.connection.window,
+                "configured_inflight_window": self.connection.configured_window,
+                "timeouts": getattr(self.connection, "timeout_count", 0),
+                "retries": getattr(self.connection, "retry_count", 0),
+            },
+            "breaker": {
+                "state": self.breaker_state,
+                "failures": self._breaker_failures,
+                "retry_in": (
+                    max(0.0, self._breaker_retry_at - time.monotonic())
+                    if self.breaker_state == BREAKER_OPEN
+                    else None
+                ),
+            },
+            "restored_at": self.restored_at.isoformat() if self.restored_at else None,
+            "capture": (
+                {"path": self.capture.path, "records": self.capture.records} if self.capture is not None else None
+            ),
+            "last_update_success": self.last_update_success,
+            "metrics": self.metrics.as_dict(),
+        }
+
     async def async_shutdown(self):
         """Schließe die Verbindung beim Herunterfahren."""
-        if self._client:
-            self._client.close()
+        if self._unsub_write_flush:
+            self._unsub_write_flush()
+            self._unsub_write_flush = None
+        if self._unsub_new_register_read:
+            self._unsub_new_register_read()
+            self._unsub_new_register_read = None
+        for _, _, waiters in self._pending_writes.values():
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(UpdateFailed("Coordinator shut down before the write was sent"))
+        self._pending_writes = {}
+        if self.capture is not None:
+            await self.capture.async_close()
+        # Eine gemeinsame Verbindung gibt async_release_connection frei
+        if self._owns_connection:
+            self.connection.close()
+        await super().async_shutdown()
+
+    async def async_write_register(self, register, value, register_type='int16'):
+        """Schreibe einen Wert in ein Modbus-Register.
+
+        Schreibzugriffe werden für WRITE_DEBOUNCE_SECONDS gesammelt: wiederholte
+        Werte für dasselbe Register ersetzen sich, benachbarte Register werden
+        mit einer Anfrage (Function Code 16) geschrieben. Anschließend werden
+        nur die geschriebenen Register neu gelesen.
+        """
+        if self.breaker_state == BREAKER_OPEN:
+            raise UpdateFailed(f"Controller {self.host}:{self.port} unreachable, value for register {register} not written")
+        future = self.hass.loop.create_future()
+        _, _, waiters = self._pending_writes.get(register, (None, None, []))
+        self._pending_writes[register] = (value, register_type, [*waiters, future])
+        if self._unsub_write_flush is None:
+            self._unsub_write_flush = async_call_later(self.hass, WRITE_DEBOUNCE_SECONDS, self._async_handle_write_timer)
+        await future
+
+    async def _async_handle_write_timer(self, _now):
+        self._unsub_write_flush = None
+        # Während eines laufenden Schreibvorgangs eingehende Werte werden danach geschrieben
+        async with self._write_lock:
+            await self._async_flush_writes()
+
+    async def _async_flush_writes(self):
+        """Schreibt alle gesammelten Werte und liest die betroffenen Register zurück."""
+        pending, self._pending_writes = self._pending_writes, {}
+        if not pending:
+            return
+
+        words = {}
+        owners = {}
+        errors = {}
+        for register, (value, register_type, _) in pending.items():
+            try:
+                encoded = encode_value(value, register_type, self.word_order)
+            except (struct.error, ValueError) as err:
+                errors[register] = UpdateFailed(f"Invalid value {value} for register {register}: {err}")
+                continue
+            for offset, word in enumerate(encoded):
+                words[register + offset] = word
+                owners[register + offset] = register
 
-    async def async_write_register(self, register, value):
-        """Schreibe einen Wert in ein Modbus-Register."""
         try:
-            if not self._client or not self._client.is_socket_open():
-                self._client = ModbusTcpClient(self.host, self.port)
-                if not await self.hass.async_add_executor_job(self._client.connect):
-                    raise UpdateFailed(f"Failed to connect to Modbus client {self.host}:{self.port}")
-
-            # Erstelle eine Funktion, die das Schreiben durchführt
-            def write_to_register():
-                return self._client.write_registers(
-                    address=register,
-                    values=[value],
-                    slave=self.slave_id
-                )
+            await self._async_connect()
+        except Exception as err:
+            _LOGGER.error(f"Error writing registers {sorted(pending)}: {err}")
+            words = {}
+            errors.update({register: UpdateFailed(f"Error writing to register {register}: {err}") for register in pending})
 
-            # Führe die Schreiboperation in einem Executor aus
-            result = await self.hass.async_add_executor_job(write_to_register)
+        written = []
+        for address, values in build_write_plan(words):
+            registers = sorted({owners[address + offset] for offset in range(len(values))})
+            try:
+                result = await self._write_registers(address, values)
+                if result.isError():
+                    raise UpdateFailed(f"{result}")
+                _LOGGER.debug(f"Successfully wrote {values} to registers {address}-{address + len(values) - 1}")
+                written.extend(registers)
+            except Exception as err:
+                _LOGGER.error(f"Error writing to registers {registers}: {err}")
+                errors.update({register: UpdateFailed(f"Error writing to register {register}: {err}") for register in registers})
 
-            if result.isError():
-                raise UpdateFailed(f"Failed to write to register {register}: {result}")
+        if written:
+            try:
+                await self.async_refresh_registers(
+                    written,
+                    expected={register: pending[register][0] for register in written},
+                )
+            except Exception as err:
+                _LOGGER.error(f"Error reading back registers {written}: {err}")
+
+        for register, (_, _, waiters) in pending.items():
+            for waiter in waiters:
+                if waiter.done():
+                    continue
+                if register in errors:
+                    waiter.set_exception(errors[register])
+                else:
+                    waiter.set_result(None)
 
-            _LOGGER.debug(f"Successfully wrote value {value} to register {register}")
+    async def async_write_and_read(self, register, value, register_type='int16', read_registers=()):
+        """Schreibt einen Wert sofort und liest `read_registers` im selben Transaktionsfenster.
 
-            # Aktualisiere die lokalen Daten
-            await self.async_request_refresh()
+        Anders als `async_write_register` wird nicht gesammelt; Schreib- und
+        Leseanfrage werden direkt hintereinander gesendet. Die gelesenen Werte
+        werden übernommen und die betroffenen Entitäten benachrichtigt.
+        Transportfehler und Erfolge fließen wie bei der Abfrage in den Circuit
+        Breaker ein.
+        """
+        if self.breaker_state == BREAKER_OPEN:
+            raise UpdateFailed(f"Controller {self.host}:{self.port} unreachable, value for register {register} not written")
+        try:
+            payload = encode_value(value, register_type, self.word_order)
+        except (struct.error, ValueError) as err:
+            raise UpdateFailed(f"Invalid value {value} for register {register}: {err}") from err
 
+        read_plan = build_read_plan(
+            {read_register: self._registers_to_read.get(read_register, 'int16') for read_register in read_registers},
+            self.read_gap,
+            word_order=self.word_order,
+            unreadable=self._unreadable_gaps,
+        )
+        try:
+            await self._async_connect()
+            result, *blocks = await asyncio.gather(
+                self._write_registers(register, payload),
+                *(self._async_read_block(block) for block in read_plan),
+            )
+        except (ConnectionException, ModbusIOException, asyncio.TimeoutError) as err:
+            self._breaker_failure(err)
+            raise UpdateFailed(f"Error writing to register {register}: {err}") from err
         except Exception as err:
-            _LOGGER.exception(f"Error writing to register {register}: {err}")
-            raise UpdateFailed(f"Error writing to register {register}: {err}")
+            raise UpdateFailed(f"Error writing to register {register}: {err}") from err
+        # Auch eine Exception-Antwort zeigt, dass die Steuerung antwortet
+        self._breaker_success()
+        if result.isError():
+            raise UpdateFailed(f"Error writing to register {register}: {result}")
 
+        if self.data is None:
+            self.data = self.registers
+        values = {}
+        for block_values in blocks:
+            for read_register, read_value in block_values:
+                if read_value is not None:
+                    self.registers.set(read_register, read_value)
+                    values[read_register] = read_value
+        self.async_update_register_listeners(values.keys())
+        return values
 
+    async def async_refresh_registers(self, registers, expected=None):
+        """Liest gezielt einzelne Register neu, ohne einen vollständigen Zyklus.
 
-    def _write_registers(self, register, payload, count):
-        return self._client.write_registers(register, payload, unit=self.slave_id, count=count)
+        Die Werte werden direkt in den Registerspeicher übernommen und nur die Entitäten
+        dieser Register benachrichtigt. Mit `expected` (Register -> Rohwert)
+        wird geprüft, ob die Steuerung geschriebene Werte übernommen hat.
+        Gibt die gelesenen Werte zurück.
+        """
+        registers = {
+            register: self._registers_to_read[register]
+            for register in registers
+            if register in self._registers_to_read and register not in self._unsupported
+        }
+        if not registers:
+            return {}
 
+        await self._async_connect()
+        if self.data is None:
+            self.data = self.registers
+
+        values = {}
+        results = await asyncio.gather(
+            *(
+                self._async_read_block(block)
+                for block in build_read_plan(
+                    registers, self.read_gap, word_order=self.word_order, unreadable=self._unreadable_gaps
+                )
+            )
+        )
+        for block_values in results:
+            for register, value in block_values:
+                if value is None:
+                    continue
+                self.registers.set(register, value)
+                values[register] = value
+
+        for register, value in (expected or {}).items():
+            if register in values and not math.isclose(values[register], value, rel_tol=1e-6):
+                _LOGGER.warning(
+                    f"Register {register} reads {values[register]} after writing {value}; "
+                    "the controller did not accept the value"
+                )
+
+        self.async_update_register_listeners(values.keys())
+        return values
+
+    @callback
+    def async_update_register_listeners(self, registers):
+        """Benachrichtigt die Entitäten, die eines der Register anzeigen."""
+        registers = set(registers)
+        for update_callback, context in list(self._listeners.values()):
+            if context is not None and not registers.isdisjoint(context):
+                update_callback()
+
+    async def _write_registers(self, register, payload):
+        start = time.monotonic()
+        try:
+            result = await self.connection.async_write_registers(register, payload, self.slave_id, self.metrics)
+        except Exception as err:
+            self.metrics.record_write(len(payload), time.monotonic() - start, False)
+            self._capture(WRITE_MULTIPLE_REGISTERS, register, payload, start, error=err)
+            raise
+        self.metrics.record_write(len(payload), time.monotonic() - start, not result.isError())
+        self._capture(WRITE_MULTIPLE_REGISTERS, register, payload, start, result)
+        return result
@@ -0,0 +1,92 @@
+"""Geräte eines Konfigurationseintrags und Zuordnung der Entitätsbeschreibungen zu ihnen."""
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from typing import TypeVar
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import DeviceInfo
+
+from .const import DATA_DEVICE_INFOS, DOMAIN, MANUFACTURER, MODULE_COUNT_KEYS, MODULE_DEFAULT_COUNTS, SINGLE_DEVICES
+from .modules import module_instance
+
+# Gerät: (Modul, Instanz) bzw. (Gerät, None) für Geräte ohne Modulnummer
+Device = tuple[str, int | None]
+
+_Description = TypeVar("_Description")
+
+DEVICE_NAMES = {
+    "general_ambient": "Lambda General Ambient",
+    "e_manager": "Lambda E-Manager",
+    "heatpump": "Lambda Heatpump",
+    "boiler": "Lambda Boiler",
+    "buffer": "Lambda Buffer",
+    "solar": "Lambda Solar",
+    "heatingcircuit": "Lambda Heating Circuit",
+}
+
+
+def description_device(key: str) -> Device | None:
+    """Gibt das Gerät zurück, zu dem der Schlüssel einer Beschreibung gehört."""
+    module = module_instance(key)
+    if module is not None:
+        return module
+    for device in SINGLE_DEVICES:
+        if key.startswith(f"{device}_"):
+            return device, None
+    return None
+
+
+def index_descriptions(descriptions: Iterable[_Description]) -> dict[Device, tuple[_Description, ...]]:
+    """Ordnet Beschreibungen ihren Geräten zu; wird einmal beim Import je Plattform erzeugt."""
+    index: dict[Device, list[_Description]] = {}
+    for description in descriptions:
+        device = description_device(description.key)
+        if device is not None:
+            index.setdefault(device, []).append(description)
+    return {device: tuple(items) for device, items in index.items()}
+
+
+@callback
+def async_get_device_infos(hass: HomeAssistant, config_entry: ConfigEntry) -> dict[Device, DeviceInfo]:
+    """Geräteinformationen aller konfigurierten Geräte; werden einmal je Eintrag erzeugt."""
+    cache = hass.data.setdefault(DATA_DEVICE_INFOS, {})
+    device_infos = cache.get(config_entry.entry_id)
+    if device_infos is not None:
+        return device_infos
+
+    devices: list[Device] = [(device, None) for device in SINGLE_DEVICES]
+    for module, key in MODULE_COUNT_KEYS.items():
+        count = config_entry.data.get(key, MODULE_DEFAULT_COUNTS.get(module, 0))
+        devices.extend((module, instance) for instance in range(1, count + 1))
+
+    model = config_entry.data.get("model", "Unknown Model")
+    device_infos = cache[config_entry.entry_id] = {}
+    for name, instance in devices:
+        suffix = name if instance is None else f"{name}_{instance}"
+        device_infos[(name, instance)] = DeviceInfo(
+            identifiers={(DOMAIN, f"{config_entry.entry_id}_{suffix}")},
+            name=DEVICE_NAMES[name] if instance is None else f"{DEVICE_NAMES[name]} {instance}",
+            manufacturer=MANUFACTURER,
+            model=model,
+        )
+    return device_infos
+
+
+@callback
+def async_release_device_infos(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    hass.data.get(DATA_DEVICE_INFOS, {}).pop(config_entry.entry_id, None)
+
+
+def entry_descriptions(
+    index: dict[Device, tuple[_Description, ...]],
+    device_infos: dict[Device, DeviceInfo],
+) -> Iterator[tuple[_Description, DeviceInfo]]:
+    """Liefert die Beschreibungen der konfigurierten Geräte mit ihren Geräteinformationen."""
+    for device, descriptions in index.items():
+        device_info = device_infos.get(device)
+        if device_info is None:
+            continue
+        for description in descriptions:
+            yield description, device_info
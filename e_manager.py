@@ -0,0 +1,108 @@
+"""Schneller Schreibkanal für den PV-Überschuss an den E-Manager."""
+from __future__ import annotations
+
+from datetime import timedelta
+import logging
+import time
+
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN, UnitOfPower
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event, async_track_time_interval
+
+from .const import (
+    BREAKER_OPEN,
+    E_MANAGER_KEEPALIVE,
+    E_MANAGER_POWER_INPUT_REGISTER,
+    E_MANAGER_READ_BACK_REGISTERS,
+)
+from .coordinator import LambdaHeatpumpCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Wertebereich des int16-Registers "actual power input" in W
+_POWER_MIN = -32768
+_POWER_MAX = 32767
+
+
+class LambdaEManagerChannel:
+    """Schreibt den Wert eines HA-Sensors im festen Takt in das E-Manager-Register 102.
+
+    Der Sensorwert (W oder kW) wird bei jeder Zustandsänderung übernommen und
+    höchstens einmal pro `interval` geschrieben. Unveränderte Werte werden
+    übersprungen, außer E_MANAGER_KEEPALIVE ist seit dem letzten Schreiben
+    vergangen. Die Register 102-104 werden mit derselben Anfrage-Welle
+    gelesen, ohne auf die reguläre Abfrage zu warten. Bei offenem Circuit
+    Breaker des Coordinators wird nicht geschrieben.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: LambdaHeatpumpCoordinator,
+        source_entity_id: str,
+        interval: timedelta,
+    ) -> None:
+        self.hass = hass
+        self.coordinator = coordinator
+        self.source_entity_id = source_entity_id
+        self.interval = interval
+        self._value: int | None = None
+        self._written: int | None = None
+        self._written_at = 0.0
+        self._writing = False
+        self._unsubs = []
+
+    @callback
+    def async_start(self) -> None:
+        self._update_value(self.hass.states.get(self.source_entity_id))
+        self._unsubs = [
+            async_track_state_change_event(self.hass, [self.source_entity_id], self._handle_source_change),
+            async_track_time_interval(self.hass, self._async_write, self.interval),
+        ]
+        _LOGGER.debug(f"E-Manager channel started: {self.source_entity_id} every {self.interval.total_seconds()} s")
+
+    @callback
+    def async_stop(self) -> None:
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs = []
+
+    @callback
+    def _handle_source_change(self, event: Event) -> None:
+        self._update_value(event.data.get("new_state"))
+
+    def _update_value(self, state) -> None:
+        if state is None or state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            self._value = None
+            return
+        try:
+            value = float(state.state)
+        except ValueError:
+            _LOGGER.debug(f"Ignoring non-numeric state {state.state!r} of {self.source_entity_id}")
+            self._value = None
+            return
+        if state.attributes.get("unit_of_measurement") == UnitOfPower.KILO_WATT:
+            value *= 1000
+        self._value = max(_POWER_MIN, min(round(value), _POWER_MAX))
+
+    async def _async_write(self, _now=None) -> None:
+        value = self._value
+        if value is None or self._writing:
+            return
+        # Solange der Circuit Breaker offen ist, übernimmt die reguläre Abfrage die Prüfung
+        if self.coordinator.breaker_state == BREAKER_OPEN:
+            return
+        if value == self._written and time.monotonic() - self._written_at < E_MANAGER_KEEPALIVE.total_seconds():
+            return
+
+        self._writing = True
+        try:
+            await self.coordinator.async_write_and_read(
+                E_MANAGER_POWER_INPUT_REGISTER, value, 'int16', E_MANAGER_READ_BACK_REGISTERS
+            )
+            self._written = value
+            self._written_at = time.monotonic()
+        except Exception as err:
+            _LOGGER.debug(f"Error writing E-Manager power input {value} W: {err}")
+        finally:
+            self._writing = False
@@ -0,0 +1,118 @@
+"""Laufzeitkennzahlen des Coordinators."""
+from __future__ import annotations
+
+from bisect import bisect_left
+
+# Obergrenzen der Latenz-Buckets in ms; der letzte Bucket ist unbegrenzt
+LATENCY_BUCKETS_MS = (5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Größe der Modbus-TCP-Frames (MBAP-Header 7 Byte + PDU)
+_READ_REQUEST_BYTES = 12
+_READ_RESPONSE_BYTES = 9
+_WRITE_REQUEST_BYTES = 13
+_WRITE_RESPONSE_BYTES = 12
+
+
+class CoordinatorMetrics:
+    """Sammelt Dauer, Latenzen und Fehler der Modbus-Kommunikation."""
+
+    def __init__(self) -> None:
+        self.cycles = 0
+        self.failed_cycles = 0
+        # Bei offenem Circuit Breaker ohne Anfrage übersprungene Zyklen
+        self.skipped_cycles = 0
+        self.last_cycle_duration: float | None = None
+        self.max_cycle_duration: float | None = None
+        self.last_interval_usage: float | None = None
+        self.last_cycle_requests = 0
+        self.requests = 0
+        # Anfragen außerhalb der Abfragezyklen (Schreiben, gezieltes Nachlesen, E-Manager)
+        self.out_of_cycle_requests = 0
+        self.read_errors = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.reconnects = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.last_block_latency: float | None = None
+        self._cycle_requests = 0
+
+    def record_read(self, count: int, latency: float, ok: bool, cycle: bool = False) -> None:
+        """Erfasst eine Leseanfrage (Latenz in Sekunden); `cycle` kennzeichnet Anfragen des Abfragezyklus."""
+        self._record_request(latency, cycle)
+        self.bytes_sent += _READ_REQUEST_BYTES
+        if ok:
+            self.bytes_received += _READ_RESPONSE_BYTES + 2 * count
+        else:
+            self.read_errors += 1
+
+    def record_write(self, count: int, latency: float, ok: bool) -> None:
+        """Erfasst eine Schreibanfrage (Latenz in Sekunden)."""
+        self._record_request(latency, False)
+        self.bytes_sent += _WRITE_REQUEST_BYTES + 2 * count
+        if ok:
+            self.bytes_received += _WRITE_RESPONSE_BYTES
+
+    def record_timeout(self) -> None:
+        self.timeouts += 1
+
+    def record_retry(self) -> None:
+        self.retries += 1
+
+    def record_reconnect(self) -> None:
+        self.reconnects += 1
+
+    def record_cycle(self, duration: float, interval: float | None, ok: bool) -> None:
+        """Erfasst einen vollständigen Abfragezyklus (Dauer in Sekunden)."""
+        self.cycles += 1
+        if not ok:
+            self.failed_cycles += 1
+        duration_ms = duration * 1000
+        self.last_cycle_duration = duration_ms
+        self.max_cycle_duration = max(self.max_cycle_duration or 0.0, duration_ms)
+        self.last_interval_usage = duration / interval * 100 if interval else None
+        self.last_cycle_requests = self._cycle_requests
+        self._cycle_requests = 0
+
+    def record_skipped_cycle(self) -> None:
+        """Erfasst einen übersprungenen Zyklus, ohne Dauer und Auslastung zu überschreiben."""
+        self.skipped_cycles += 1
+
+    def _record_request(self, latency: float, cycle: bool) -> None:
+        latency_ms = latency * 1000
+        self.requests += 1
+        if cycle:
+            self._cycle_requests += 1
+        else:
+            self.out_of_cycle_requests += 1
+        self.last_block_latency = latency_ms
+        self.latency_histogram[bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+
+    @property
+    def histogram(self) -> dict[str, int]:
+        """Latenz-Histogramm mit lesbaren Bucket-Namen."""
+        labels = [f"le_{bucket}ms" for bucket in LATENCY_BUCKETS_MS] + [f"gt_{LATENCY_BUCKETS_MS[-1]}ms"]
+        return dict(zip(labels, self.latency_histogram))
+
+    def as_dict(self) -> dict:
+        """Alle Kennzahlen, z.B. für den Diagnose-Download."""
+        return {
+            "cycles": self.cycles,
+            "failed_cycles": self.failed_cycles,
+            "skipped_cycles": self.skipped_cycles,
+            "last_cycle_duration_ms": self.last_cycle_duration,
+            "max_cycle_duration_ms": self.max_cycle_duration,
+            "last_interval_usage_percent": self.last_interval_usage,
+            "last_cycle_requests": self.last_cycle_requests,
+            "requests": self.requests,
+            "out_of_cycle_requests": self.out_of_cycle_requests,
+            "read_errors": self.read_errors,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "reconnects": self.reconnects,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "last_block_latency_ms": self.last_block_latency,
+            "block_latency_histogram": self.histogram,
+        }
@@ -0,0 +1,115 @@
+"""Mehrfach vorhandene Module (Wärmepumpen, Boiler, Puffer, Solar, Heizkreise)."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+from dataclasses import replace
+import logging
+import re
+from typing import TypeVar
+
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+
+from .const import (
+    BREAKER_PROBE_REGISTER,
+    MODBUS_ILLEGAL_DATA_ADDRESS,
+    MODULE_BASE_REGISTERS,
+    MODULE_MAX_INSTANCES,
+    MODULE_PROBE_COUNT,
+    MODULE_STRIDE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Schlüssel modulbezogener Beschreibungen, z.B. "boiler_1_actual_high_temperature"
+_MODULE_KEY = re.compile(r"^(?P<module>[a-z]+)_(?P<instance>\d+)_(?P<name>.+)$")
+
+_Description = TypeVar("_Description")
+
+
+def module_instance(key: str) -> tuple[str, int] | None:
+    """Gibt (Modul, Instanz) für den Schlüssel einer Beschreibung zurück, sonst None."""
+    match = _MODULE_KEY.match(key)
+    if match is None or match["module"] not in MODULE_MAX_INSTANCES:
+        return None
+    return match["module"], int(match["instance"])
+
+
+def expand_module_descriptions(templates: Iterable[_Description]) -> tuple[_Description, ...]:
+    """Erzeugt aus den Beschreibungen der ersten Modulinstanz die aller Instanzen.
+
+    Instanz n liegt bei Basisadresse + MODULE_STRIDE * (n - 1) und erhält den
+    Schlüssel "{modul}_{n}_..."; der Übersetzungsschlüssel folgt dem Schlüssel.
+    Der Name bleibt gleich, die Entitäten unterscheiden sich über den
+    Gerätenamen (has_entity_name). Beschreibungen ohne Modul werden
+    unverändert übernommen.
+    """
+    descriptions = []
+    for template in templates:
+        module = module_instance(template.key)
+        if module is None or module[1] != 1:
+            descriptions.append(template)
+            continue
+        name, prefix = module[0], f"{module[0]}_1_"
+        descriptions.append(template)
+        for instance in range(2, MODULE_MAX_INSTANCES[name] + 1):
+            descriptions.append(
+                replace(
+                    template,
+                    key=f"{name}_{instance}_{template.key.removeprefix(prefix)}",
+                    register=template.register + MODULE_STRIDE * (instance - 1),
+                )
+            )
+    return tuple(descriptions)
+
+
+async def async_discover_modules(connection, slave_id) -> dict[str, int]:
+    """Ermittelt die Anzahl der vorhandenen Instanzen je Modul.
+
+    Für jede mögliche Instanz werden die ersten Register ihres Bereichs
+    gelesen; alle Anfragen laufen gleichzeitig. Eine Instanz fehlt nur, wenn
+    die Steuerung mit "Illegal Data Address" antwortet. Gezählt werden die
+    lückenlos vorhandenen Instanzen ab Nr. 1.
+
+    Raises ValueError, wenn die Steuerung unter der Slave-ID nicht antwortet,
+    und ModbusIOException bzw. ConnectionException, wenn eine Instanz wegen
+    eines Übertragungsfehlers nicht geprüft werden konnte.
+    """
+    probes = [
+        (module, instance)
+        for module, max_instances in MODULE_MAX_INSTANCES.items()
+        for instance in range(1, max_instances + 1)
+    ]
+    general, *results = await asyncio.gather(
+        connection.async_read_holding_registers(BREAKER_PROBE_REGISTER, 1, slave_id),
+        *(
+            connection.async_read_holding_registers(
+                MODULE_BASE_REGISTERS[module] + MODULE_STRIDE * (instance - 1), MODULE_PROBE_COUNT, slave_id
+            )
+            for module, instance in probes
+        ),
+        return_exceptions=True,
+    )
+    if isinstance(general, (ConnectionException, ModbusIOException)):
+        raise general
+    if isinstance(general, BaseException) or general.isError():
+        raise ValueError(f"Slave {slave_id} does not respond: {general}")
+
+    found = {module: set() for module in MODULE_MAX_INSTANCES}
+    for (module, instance), result in zip(probes, results):
+        # Ein Timeout ist kein Hinweis auf ein fehlendes Modul
+        if isinstance(result, BaseException):
+            raise result
+        if not result.isError():
+            found[module].add(instance)
+        elif result.exception_code != MODBUS_ILLEGAL_DATA_ADDRESS:
+            raise ModbusIOException(f"Probe of {module} {instance} failed: {result}")
+
+    counts = {}
+    for module, instances in found.items():
+        count = 0
+        while count + 1 in instances:
+            count += 1
+        counts[module] = count
+    _LOGGER.debug(f"Discovered modules for slave {slave_id}: {counts}")
+    return counts
@@ -6,30 +6,29 @@ from homeassistant.components.number import NumberEntity, NumberEntityDescriptio
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.const import UnitOfTemperature
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN, MANUFACTURER
+from .const import DOMAIN, POLL_TIER_SLOW
+from .coordinator import LambdaHeatpumpCoordinator
+from .devices import async_get_device_infos, entry_descriptions, index_descriptions
+from .modules import expand_module_descriptions
 
 _LOGGER = logging.getLogger(__name__)
 
 
-
-
-from .const import DOMAIN, MANUFACTURER
-from .coordinator import LambdaHeatpumpCoordinator
-
 @dataclass(kw_only=True)
 class LambdaNumberEntityDescription(NumberEntityDescription):
     """Beschreibung eines Lambda Heatpump Number."""
     register: int
     data_type: str = "int16"
     factor: float = 1.0
+    poll_tier: str = POLL_TIER_SLOW
 
 _LOGGER = logging.getLogger(__name__)
 
-NUMBER_DESCRIPTIONS: Final[tuple[LambdaNumberEntityDescription, ...]] = (
+# Beschreibungen der ersten Modulinstanz; weitere Instanzen werden daraus erzeugt
+BASE_NUMBER_DESCRIPTIONS: Final[tuple[LambdaNumberEntityDescription, ...]] = (
     LambdaNumberEntityDescription(
         key="boiler_1_setting_for_maximum_boiler_temperature",
         name="Setting for Maximum Boiler Temperature",
@@ -77,6 +76,11 @@ NUMBER_DESCRIPTIONS: Final[tuple[LambdaNumberEntityDescription, ...]] = (
     # Fügen Sie hier weitere Number-Beschreibungen hinzu
 )
 
+# Alle Instanzen bis MODULE_MAX_INSTANCES, einmalig beim Import erzeugt
+NUMBER_DESCRIPTIONS: Final[tuple[LambdaNumberEntityDescription, ...]] = expand_module_descriptions(BASE_NUMBER_DESCRIPTIONS)
+# Beschreibungen je Gerät (Modul, Instanz)
+NUMBER_DESCRIPTIONS_BY_DEVICE = index_descriptions(NUMBER_DESCRIPTIONS)
+
 
 
 
@@ -88,80 +92,54 @@ class LambdaHeatpumpNumber(CoordinatorEntity, NumberEntity):
         description: LambdaNumberEntityDescription,
         device_info: DeviceInfo,
     ):
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=frozenset((description.register,)))
         self.entity_description = description
         self._register = description.register
 
+        # Der Gerätename (z.B. "Lambda Heatpump 2") unterscheidet gleichnamige Entitäten der Modulinstanzen
+        self._attr_has_entity_name = True
         self._attr_name = description.name
-        self._attr_translation_key = description.key
+        self._attr_translation_key = description.translation_key or description.key
         self._attr_unique_id = f"{config_entry.entry_id}_{description.key}"
         self._attr_device_info = device_info
 
-        self.coordinator.add_register(self._register, description.data_type)
+        # Abgefragt wird das Register erst, wenn die Entität aktiviert und hinzugefügt ist
+        self._subscription = None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        description = self.entity_description
+        self._subscription = self.coordinator.add_register(self._register, description.data_type, description.poll_tier)
+
+    async def async_will_remove_from_hass(self) -> None:
+        self.coordinator.remove_register(self._subscription)
+        self._subscription = None
+        await super().async_will_remove_from_hass()
 
     @property
     def native_value(self):
-        value = self.coordinator.data.get(f"register_{self._register}")
+        value = self.coordinator.value(self._subscription)
         if value is not None:
             return value * self.entity_description.factor
         return None
 
     async def async_set_native_value(self, value: float) -> None:
         scaled_value = int(value / self.entity_description.factor)
-        await self.coordinator.async_write_register(self._register, scaled_value)
-        await self.coordinator.async_request_refresh()
+        await self.coordinator.async_write_register(self._register, scaled_value, self.entity_description.data_type)
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
-
-    num_boilers = config_entry.data.get("amount_of_boilers", 0)
-    num_buffers = config_entry.data.get("amount_of_buffers", 0)
-    num_solar = config_entry.data.get("amount_of_solar", 0)
-    model = config_entry.data.get("model", "Unknown Model")
-
-    device_infos = {
-        "boiler_1": DeviceInfo(
-            identifiers={(DOMAIN, f"{config_entry.entry_id}_boiler_1")},
-            name="Lambda Boiler 1",
-            manufacturer=MANUFACTURER,
-            model=model,
-        ),
-        "buffer_1": DeviceInfo(
-            identifiers={(DOMAIN, f"{config_entry.entry_id}_buffer_1")},
-            name="Lambda Buffer 1",
-            manufacturer=MANUFACTURER,
-            model=model,
-        ),
-        "solar_1": DeviceInfo(
-            identifiers={(DOMAIN, f"{config_entry.entry_id}_solar_1")},
-            name="Lambda Solar 1",
-            manufacturer=MANUFACTURER,
-            model=model,
-        ),
-    }
-
-    numbers = []
-    for description in NUMBER_DESCRIPTIONS:
-        if "boiler_" in description.key and int(description.key.split('_')[1]) > num_boilers:
-            continue
-        if "buffer_" in description.key and int(description.key.split('_')[1]) > num_buffers:
-            continue
-        if "solar_" in description.key and int(description.key.split('_')[1]) > num_solar:
-            continue
-
-        category = description.key.split('_')[0]
-        device_info = device_infos.get(f"{category}_{description.key.split('_')[1]}", None)
-
-        if device_info:
-            number = LambdaHeatpumpNumber(
-                coordinator=coordinator,
-                config_entry=config_entry,
-                description=description,
-                device_info=device_info,
-            )
-            numbers.append(number)
-
-    async_add_entities(numbers)
+    device_infos = async_get_device_infos(hass, config_entry)
+
+    async_add_entities(
+        LambdaHeatpumpNumber(
+            coordinator=coordinator,
+            config_entry=config_entry,
+            description=description,
+            device_info=device_info,
+        )
+        for description, device_info in entry_descriptions(NUMBER_DESCRIPTIONS_BY_DEVICE, device_infos)
+    )
 
 # class LambdaWritableNumberEntity(CoordinatorEntity, NumberEntity):
 #     def __init__(self, coordinator, name, register, model, min_value, max_value, step, factor=1, config_entry_id=None):
@@ -0,0 +1,166 @@
+"""Lese- und Schreibplanung: fasst Modbus-Register zu Anfragen zusammen und (de)kodiert sie."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+import struct
+
+from .const import (
+    DEFAULT_READ_GAP,
+    MODBUS_MAX_READ_REGISTERS,
+    MODBUS_MAX_WRITE_REGISTERS,
+    WORD_ORDER_BIG,
+    WORD_ORDER_LITTLE,
+)
+
+# struct-Formatzeichen je Datentyp (Big Endian innerhalb eines Wortes)
+REGISTER_FORMATS = {
+    "int16": "h",
+    "uint16": "H",
+    "int32": "i",
+    "uint32": "I",
+    "float32": "f",
+}
+
+
+def register_size(register_type: str) -> int:
+    """Gibt die Anzahl der Modbus-Register für einen Datentyp zurück."""
+    return struct.calcsize(">" + REGISTER_FORMATS.get(register_type, "H")) // 2
+
+
+@dataclass(frozen=True)
+class ReadBlock:
+    """Zusammenhängender Registerbereich, der mit einer Anfrage gelesen wird.
+
+    `layout` beschreibt den gesamten Block inklusive Lücken, sodass alle Werte
+    mit einem einzigen `unpack_from` dekodiert werden.
+    """
+
+    address: int
+    count: int
+    registers: tuple[tuple[int, str], ...]
+    layout: struct.Struct
+    words: struct.Struct
+    swap_offsets: tuple[int, ...] = ()
+
+    @property
+    def end(self) -> int:
+        """Letzte gelesene Registeradresse."""
+        return self.address + self.count - 1
+
+    def decode(self, registers: list[int]) -> tuple:
+        """Dekodiert die Rohwerte eines Blocks in der Reihenfolge von `registers`."""
+        if self.swap_offsets:
+            registers = list(registers)
+            for offset in self.swap_offsets:
+                registers[offset], registers[offset + 1] = registers[offset + 1], registers[offset]
+        return self.layout.unpack_from(self.words.pack(*registers))
+
+
+def compile_block(
+    address: int,
+    count: int,
+    members: tuple[tuple[int, str], ...],
+    word_order: str = WORD_ORDER_BIG,
+) -> ReadBlock:
+    """Erzeugt den Dekodierplan für einen Block mit sortierten, überlappungsfreien Registern."""
+    fmt = [">"]
+    swap_offsets = []
+    position = address
+    for register, register_type in members:
+        if register > position:
+            fmt.append(f"{(register - position) * 2}x")
+        size = register_size(register_type)
+        if size == 2 and word_order == WORD_ORDER_LITTLE:
+            swap_offsets.append(register - address)
+        fmt.append(REGISTER_FORMATS[register_type])
+        position = register + size
+    return ReadBlock(
+        address=address,
+        count=count,
+        registers=members,
+        layout=struct.Struct("".join(fmt)),
+        words=struct.Struct(f">{count}H"),
+        swap_offsets=tuple(swap_offsets),
+    )
+
+
+def build_read_plan(
+    registers: dict[int, str],
+    max_gap: int = DEFAULT_READ_GAP,
+    max_count: int = MODBUS_MAX_READ_REGISTERS,
+    word_order: str = WORD_ORDER_BIG,
+    unreadable: Iterable[tuple[int, int]] = (),
+) -> list[ReadBlock]:
+    """Gruppiert Register in möglichst wenige Leseblöcke.
+
+    Register werden zusammengefasst, solange die Lücke zum vorherigen Register
+    höchstens `max_gap` Register beträgt und der Block nicht größer als
+    `max_count` Register wird. Überlappende Register beginnen einen neuen Block,
+    ebenso Lücken, die einen der Bereiche (Start, Ende) aus `unreadable` berühren.
+    """
+    unreadable = tuple(unreadable)
+    blocks: list[ReadBlock] = []
+    members: list[tuple[int, str]] = []
+    start = end = 0
+
+    for register in sorted(registers):
+        register_type = registers[register]
+        size = register_size(register_type)
+        if (
+            members
+            and end <= register <= end + max_gap
+            and register + size - start <= max_count
+            and not any(gap_start <= register and gap_end >= end for gap_start, gap_end in unreadable)
+        ):
+            members.append((register, register_type))
+            end = register + size
+            continue
+        if members:
+            blocks.append(compile_block(start, end - start, tuple(members), word_order))
+        members = [(register, register_type)]
+        start, end = register, register + size
+
+    if members:
+        blocks.append(compile_block(start, end - start, tuple(members), word_order))
+
+    return blocks
+
+
+def encode_value(value, register_type: str, word_order: str = WORD_ORDER_BIG) -> list[int]:
+    """Wandelt einen Rohwert in die zu schreibenden 16-Bit-Worte um."""
+    fmt = ">" + REGISTER_FORMATS[register_type]
+    if register_type != "float32":
+        value = int(value)
+    words = list(struct.unpack(f">{register_size(register_type)}H", struct.pack(fmt, value)))
+    if word_order == WORD_ORDER_LITTLE:
+        words.reverse()
+    return words
+
+
+def convert_value(value, from_type: str, to_type: str, word_order: str = WORD_ORDER_BIG):
+    """Interpretiert einen als `from_type` dekodierten Wert als `to_type`.
+
+    Ist `to_type` kürzer, werden die ersten Register des Werts verwendet.
+    """
+    words = encode_value(value, from_type, word_order)
+    size = register_size(to_type)
+    if len(words) < size:
+        raise ValueError(f"Cannot read {from_type} value as {to_type}")
+    return compile_block(0, size, ((0, to_type),), word_order).decode(words[:size])[0]
+
+
+def build_write_plan(
+    words: dict[int, int],
+    max_count: int = MODBUS_MAX_WRITE_REGISTERS,
+) -> list[tuple[int, list[int]]]:
+    """Fasst direkt aufeinanderfolgende Worte zu Schreibanfragen (Startadresse, Worte) zusammen."""
+    requests: list[tuple[int, list[int]]] = []
+    for address in sorted(words):
+        if requests:
+            start, values = requests[-1]
+            if address == start + len(values) and len(values) < max_count:
+                values.append(words[address])
+                continue
+        requests.append((address, [words[address]]))
+    return requests
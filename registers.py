@@ -0,0 +1,102 @@
+"""Registerwerte des Coordinators, indiziert über feste Slots."""
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+KEY_PREFIX = "register_"
+
+# Platzhalter für Slots, für die noch kein Wert gelesen wurde
+_MISSING = object()
+
+
+@dataclass(frozen=True, eq=False)
+class RegisterSubscription:
+    """Anmeldung eines Registers durch eine Entität.
+
+    Jede Anmeldung ist ein eigenes Objekt (Vergleich über die Identität), auch
+    wenn mehrere Entitäten dasselbe Register mit gleichem Typ anmelden.
+    """
+
+    register: int
+    register_type: str
+    poll_tier: str
+    slot: int
+
+
+class RegisterStore(Mapping[str, Any]):
+    """Registerwerte in einem Array, auf das Entitäten über ihren Slot zugreifen.
+
+    Jedes Register erhält bei der Anmeldung einen festen Slot. Entitäten merken
+    sich diesen Index und lesen ihren Wert mit `value(slot)` ohne Schlüssel zu
+    formatieren. Als Mapping verhält sich der Speicher wie das frühere
+    Dictionary mit Schlüsseln "register_{n}".
+    """
+
+    __slots__ = ("_slots", "_registers", "_values")
+
+    def __init__(self, values: Mapping[str, Any] | None = None) -> None:
+        self._slots: dict[int, int] = {}
+        self._registers: list[int] = []
+        self._values: list[Any] = []
+        if values:
+            self.restore(values)
+
+    def restore(self, values: Mapping[str, Any]) -> None:
+        """Übernimmt Werte aus einem Mapping mit Schlüsseln "register_{n}"."""
+        for key, value in values.items():
+            self.set(int(key.removeprefix(KEY_PREFIX)), value)
+
+    def slot(self, register: int) -> int:
+        """Gibt den Slot eines Registers zurück und legt ihn bei Bedarf an."""
+        slot = self._slots.get(register)
+        if slot is None:
+            slot = self._slots[register] = len(self._values)
+            self._registers.append(register)
+            self._values.append(_MISSING)
+        return slot
+
+    def value(self, slot: int) -> Any:
+        """Wert eines Slots oder None, solange er nicht gelesen wurde."""
+        value = self._values[slot]
+        return None if value is _MISSING else value
+
+    def get_register(self, register: int, default: Any = None) -> Any:
+        slot = self._slots.get(register)
+        if slot is None or self._values[slot] is _MISSING:
+            return default
+        return self._values[slot]
+
+    def set(self, register: int, value: Any) -> bool:
+        """Speichert einen Wert und gibt zurück, ob er sich geändert hat."""
+        slot = self.slot(register)
+        previous = self._values[slot]
+        self._values[slot] = value
+        return previous is _MISSING or previous != value
+
+    def discard(self, register: int) -> None:
+        """Verwirft den Wert eines Registers; der Slot bleibt gültig."""
+        slot = self._slots.get(register)
+        if slot is not None:
+            self._values[slot] = _MISSING
+
+    def __getitem__(self, key: str) -> Any:
+        if not key.startswith(KEY_PREFIX):
+            raise KeyError(key)
+        try:
+            slot = self._slots[int(key[len(KEY_PREFIX):])]
+        except ValueError:
+            raise KeyError(key) from None
+        value = self._values[slot]
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        for register, value in zip(self._registers, self._values):
+            if value is not _MISSING:
+                yield f"{KEY_PREFIX}{register}"
+
+    def __len__(self) -> int:
+        return sum(value is not _MISSING for value in self._values)
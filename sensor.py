@@ -1,18 +1,25 @@
 from __future__ import annotations
 
 import logging
+import time
 from dataclasses import dataclass, field
-from typing import Final, Optional, Dict
+from datetime import timedelta
+from typing import Any, Callable, Final, Optional, Dict
 
 from homeassistant.components.sensor import SensorEntity, SensorEntityDescription, SensorDeviceClass, SensorStateClass
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity import DeviceInfo, EntityCategory
+from homeassistant.const import PERCENTAGE, UnitOfInformation, UnitOfTime
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 
-from .const import DOMAIN, MANUFACTURER
+from .const import DOMAIN, POLL_TIER_FAST, POLL_TIER_NORMAL, POLL_TIER_SLOW, POLL_TIER_ONCE
 from .coordinator import LambdaHeatpumpCoordinator
+from .devices import async_get_device_infos, entry_descriptions, index_descriptions
+from .metrics import CoordinatorMetrics
+from .modules import expand_module_descriptions
 
 @dataclass(kw_only=True)
 class LambdaSensorEntityDescription(SensorEntityDescription):
@@ -24,17 +31,39 @@ class LambdaSensorEntityDescription(SensorEntityDescription):
     min_value: float | None = None
     max_value: float | None = None
     states: Optional[Dict[int, str]] = field(default_factory=dict)
+    poll_tier: str = POLL_TIER_NORMAL
+    # Totband: neue Werte werden erst veröffentlicht, wenn sie sich um mehr als
+    # `deadband` (absolut) bzw. `deadband_percent` (relativ) geändert haben
+    # oder der letzte veröffentlichte Wert älter als `max_age` ist.
+    deadband: float | None = None
+    deadband_percent: float | None = None
+    max_age: timedelta | None = None
+
+    def __post_init__(self) -> None:
+        # `max_age` begrenzt nur das Zurückhalten durch das Totband
+        if self.max_age is not None and self.deadband is None and self.deadband_percent is None:
+            raise ValueError(f"{self.key}: max_age requires deadband or deadband_percent")
+
+
+@dataclass(kw_only=True)
+class LambdaDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Beschreibung eines Diagnose-Sensors für die Modbus-Kommunikation."""
+    value_fn: Callable[[CoordinatorMetrics], Any]
+    attributes_fn: Callable[[CoordinatorMetrics], dict] | None = None
+    entity_category: EntityCategory | None = EntityCategory.DIAGNOSTIC
 
 
 _LOGGER = logging.getLogger(__name__)
 
 
-SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
+# Beschreibungen der ersten Modulinstanz; weitere Instanzen werden daraus erzeugt
+BASE_SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
     # General Ambient
     LambdaSensorEntityDescription(
         key="general_ambient_error_number",
         name="Error Number",
         register=0,
+        poll_tier=POLL_TIER_SLOW,
         data_type="int16",
     ),
     LambdaSensorEntityDescription(
@@ -83,6 +112,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="e_manager_error_number",
         name="Error Number",
         register=100,
+        poll_tier=POLL_TIER_SLOW,
         data_type="int16",
     ),
     LambdaSensorEntityDescription(
@@ -102,6 +132,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="e_manager_actual_power_input",
         name="Actual Power Input",
         register=102,
+        poll_tier=POLL_TIER_FAST,
         data_type="int16",
         factor=1,
         unit_of_measurement="W",
@@ -112,6 +143,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="e_manager_actual_power_consumption",
         name="Actual Power Consumption",
         register=103,
+        poll_tier=POLL_TIER_FAST,
         data_type="int16",
         factor=1,
         unit_of_measurement="W",
@@ -122,6 +154,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="e_manager_power_consumption_setpoint",
         name="Power Consumption Setpoint",
         register=104,
+        poll_tier=POLL_TIER_FAST,
         data_type="int16",
         factor=1,
         unit_of_measurement="W",
@@ -147,6 +180,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="heatpump_1_error_number",
         name="Error Number",
         register=1001,
+        poll_tier=POLL_TIER_SLOW,
         data_type="int16",
     ),
     LambdaSensorEntityDescription(
@@ -205,6 +239,8 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         register=1004,
         data_type="int16",
         factor=0.01,
+        deadband=0.1,
+        max_age=timedelta(minutes=10),
         unit_of_measurement="°C",
         device_class=SensorDeviceClass.TEMPERATURE
     ),
@@ -214,6 +250,8 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         register=1005,
         data_type="int16",
         factor=0.01,
+        deadband=0.1,
+        max_age=timedelta(minutes=10),
         unit_of_measurement="°C",
         device_class=SensorDeviceClass.TEMPERATURE
     ),
@@ -266,6 +304,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="heatpump_1_actual_heating_capacity",
         name="Actual Heating Capacity",
         register=1011,
+        poll_tier=POLL_TIER_FAST,
         data_type="int16",
         factor=10,
         unit_of_measurement="W",
@@ -276,6 +315,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="heatpump_1_frequency_inverter_actual_power_consumption",
         name="Frequency Inverter Actual Power Consumption",
         register=1012,
+        poll_tier=POLL_TIER_FAST,
         data_type="int16",
         factor=1,
         unit_of_measurement="W",
@@ -294,7 +334,9 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="heatpump_1_password_register_to_release_modbus_request_registers",
         name="Password Register to Release Modbus Request Registers",
         register=1014,
+        poll_tier=POLL_TIER_ONCE,
         data_type="uint16",
+        entity_registry_enabled_default=False,
     ),
     LambdaSensorEntityDescription(
         key="heatpump_1_request_type",
@@ -376,7 +418,9 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="heatpump_1_quit_all_active_heat_pump_errors",
         name="Quit All Active Heat Pump Errors",
         register=1050,
-        data_type="uint16"
+        poll_tier=POLL_TIER_ONCE,
+        data_type="uint16",
+        entity_registry_enabled_default=False,
     ),
 
     # Boiler 1
@@ -384,6 +428,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="boiler_1_error_number",
         name="Error Number",
         register=2000,
+        poll_tier=POLL_TIER_SLOW,
         data_type="int16",
     ),
     LambdaSensorEntityDescription(
@@ -440,6 +485,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="buffer_1_error_number",
         name="Error Number",
         register=3000,
+        poll_tier=POLL_TIER_SLOW,
         data_type="int16",
     ),
     LambdaSensorEntityDescription(
@@ -482,6 +528,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="buffer_1_setting_for_maximum_buffer_temperature",
         name="Setting for Maximum Buffer Temperature",
         register=3050,
+        poll_tier=POLL_TIER_SLOW,
         data_type="int16",
         factor=0.1,
         unit_of_measurement="°C",
@@ -493,6 +540,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="solar_1_error_number",
         name="Error Number",
         register=4000,
+        poll_tier=POLL_TIER_SLOW,
         data_type="int16",
     ),
     LambdaSensorEntityDescription(
@@ -538,6 +586,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="solar_1_setting_for_maximum_buffer_temperature",
         name="Setting for Maximum Buffer Temperature",
         register=4050,
+        poll_tier=POLL_TIER_SLOW,
         data_type="int16",
         factor=0.1,
         unit_of_measurement="°C",
@@ -549,6 +598,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="solar_1_setting_for_buffer_changeover_temperature",
         name="Setting for Buffer Changeover Temperature",
         register=4051,
+        poll_tier=POLL_TIER_SLOW,
         data_type="int16",
         factor=0.1,
         unit_of_measurement="°C",
@@ -562,6 +612,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="heatingcircuit_1_error_number",
         name="Error Number",
         register=5000,
+        poll_tier=POLL_TIER_SLOW,
         data_type="int16",
     ),
     LambdaSensorEntityDescription(
@@ -608,6 +659,8 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         register=5003,
         data_type="int16",
         factor=0.01,
+        deadband=0.1,
+        max_age=timedelta(minutes=10),
         unit_of_measurement="°C",
         device_class=SensorDeviceClass.TEMPERATURE
     ),
@@ -653,6 +706,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="heatingcircuit_1_setting_for_flow_line_temperature_setpoint_offset",
         name="Setting for Flow Line Temperature Setpoint Offset",
         register=5050,
+        poll_tier=POLL_TIER_SLOW,
         data_type="int16",
         factor=0.1,
         unit_of_measurement="K",
@@ -664,6 +718,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="heatingcircuit_1_setting_for_heating_mode_room_setpoint_temperature",
         name="Setting for Heating Mode Room Setpoint Temperature",
         register=5051,
+        poll_tier=POLL_TIER_SLOW,
         data_type="int16",
         factor=0.1,
         unit_of_measurement="°C",
@@ -675,6 +730,7 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
         key="heatingcircuit_1_setting_for_cooling_mode_room_setpoint_temperature",
         name="Setting for Cooling Mode Room Setpoint Temperature",
         register=5052,
+        poll_tier=POLL_TIER_SLOW,
         data_type="int16",
         factor=0.1,
         unit_of_measurement="°C",
@@ -685,6 +741,85 @@ SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = (
 
 )
 
+# Alle Instanzen bis MODULE_MAX_INSTANCES, einmalig beim Import erzeugt
+SENSOR_DESCRIPTIONS: Final[tuple[LambdaSensorEntityDescription, ...]] = expand_module_descriptions(BASE_SENSOR_DESCRIPTIONS)
+# Beschreibungen je Gerät (Modul, Instanz)
+SENSOR_DESCRIPTIONS_BY_DEVICE = index_descriptions(SENSOR_DESCRIPTIONS)
+
+
+
+DIAGNOSTIC_SENSOR_DESCRIPTIONS: Final[tuple[LambdaDiagnosticSensorEntityDescription, ...]] = (
+    LambdaDiagnosticSensorEntityDescription(
+        key="modbus_poll_duration",
+        name="Modbus Poll Duration",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda metrics: metrics.last_cycle_duration,
+        attributes_fn=lambda metrics: {
+            "max_duration_ms": metrics.max_cycle_duration,
+            "requests": metrics.last_cycle_requests,
+            "out_of_cycle_requests": metrics.out_of_cycle_requests,
+        },
+    ),
+    LambdaDiagnosticSensorEntityDescription(
+        key="modbus_poll_interval_usage",
+        name="Modbus Poll Interval Usage",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        value_fn=lambda metrics: metrics.last_interval_usage,
+    ),
+    LambdaDiagnosticSensorEntityDescription(
+        key="modbus_block_latency",
+        name="Modbus Block Latency",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda metrics: metrics.last_block_latency,
+        attributes_fn=lambda metrics: metrics.histogram,
+    ),
+    LambdaDiagnosticSensorEntityDescription(
+        key="modbus_read_errors",
+        name="Modbus Read Errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.read_errors,
+        attributes_fn=lambda metrics: {"failed_cycles": metrics.failed_cycles, "skipped_cycles": metrics.skipped_cycles},
+    ),
+    LambdaDiagnosticSensorEntityDescription(
+        key="modbus_timeouts",
+        name="Modbus Timeouts",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.timeouts,
+        attributes_fn=lambda metrics: {"retries": metrics.retries},
+    ),
+    LambdaDiagnosticSensorEntityDescription(
+        key="modbus_reconnects",
+        name="Modbus Reconnects",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.reconnects,
+    ),
+    LambdaDiagnosticSensorEntityDescription(
+        key="modbus_bytes_received",
+        name="Modbus Bytes Received",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_registry_enabled_default=False,
+        value_fn=lambda metrics: metrics.bytes_received,
+    ),
+    LambdaDiagnosticSensorEntityDescription(
+        key="modbus_bytes_sent",
+        name="Modbus Bytes Sent",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_registry_enabled_default=False,
+        value_fn=lambda metrics: metrics.bytes_sent,
+    ),
+)
 
 
 class LambdaHeatpumpSensor(CoordinatorEntity, SensorEntity):
@@ -695,13 +830,15 @@ class LambdaHeatpumpSensor(CoordinatorEntity, SensorEntity):
         description: LambdaSensorEntityDescription,
         device_info: DeviceInfo,
     ):
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=frozenset((description.register,)))
         self.entity_description = description
         self._register = description.register
 
         # Setze den Namen
+        # Der Gerätename (z.B. "Lambda Heatpump 2") unterscheidet gleichnamige Entitäten der Modulinstanzen
+        self._attr_has_entity_name = True
         self._attr_name = description.name
-        self._attr_translation_key = description.key
+        self._attr_translation_key = description.translation_key or description.key
 
         # Eindeutige ID mit config_entry.entry_id und description.key
         self._attr_unique_id = f"{config_entry.entry_id}_{description.key}"
@@ -720,11 +857,81 @@ class LambdaHeatpumpSensor(CoordinatorEntity, SensorEntity):
         _LOGGER.debug("Description: %s", description)
         _LOGGER.debug("Übersetzung: %s", self.entity_description.key)
 
-        self.coordinator.add_register(self._register, description.data_type)
+        # Zuletzt veröffentlichter Wert für Sensoren mit Totband
+        self._published_value = None
+        self._published_available = None
+        self._published_at = None
+        # Veröffentlicht einen zurückgehaltenen Wert nach `max_age`, auch ohne weitere Änderung des Registers
+        self._unsub_max_age = None
+
+        # Abgefragt wird das Register erst, wenn die Entität aktiviert und hinzugefügt ist
+        self._subscription = None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        description = self.entity_description
+        self._subscription = self.coordinator.add_register(self._register, description.data_type, description.poll_tier)
+
+    async def async_will_remove_from_hass(self) -> None:
+        self._cancel_max_age()
+        self.coordinator.remove_register(self._subscription)
+        self._subscription = None
+        await super().async_will_remove_from_hass()
 
     @property
     def native_value(self):
-        value = self.coordinator.data.get(f"register_{self._register}")
+        if self._published_at is not None:
+            return self._published_value
+        return self._current_value()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        description = self.entity_description
+        if description.deadband is None and description.deadband_percent is None:
+            super()._handle_coordinator_update()
+            return
+
+        value = self._current_value()
+        if self.available == self._published_available and self._within_deadband(value):
+            # Der Coordinator meldet nur Änderungen; bleibt das Register stehen,
+            # würde der zurückgehaltene Wert sonst nie veröffentlicht
+            if description.max_age is not None and value != self._published_value and self._unsub_max_age is None:
+                delay = description.max_age.total_seconds() - (time.monotonic() - self._published_at)
+                self._unsub_max_age = async_call_later(self.hass, max(delay, 0), self._handle_max_age)
+            return
+
+        self._cancel_max_age()
+        self._published_value = value
+        self._published_available = self.available
+        self._published_at = time.monotonic()
+        self.async_write_ha_state()
+
+    @callback
+    def _handle_max_age(self, _now) -> None:
+        self._unsub_max_age = None
+        self._handle_coordinator_update()
+
+    def _cancel_max_age(self) -> None:
+        if self._unsub_max_age is not None:
+            self._unsub_max_age()
+            self._unsub_max_age = None
+
+    def _within_deadband(self, value) -> bool:
+        """Prüft, ob sich der Wert seit der letzten Veröffentlichung nur innerhalb des Totbands bewegt hat."""
+        description = self.entity_description
+        previous = self._published_value
+        if self._published_at is None or not isinstance(value, (int, float)) or not isinstance(previous, (int, float)):
+            return False
+        if description.max_age is not None and time.monotonic() - self._published_at >= description.max_age.total_seconds():
+            return False
+
+        band = description.deadband or 0.0
+        if description.deadband_percent is not None:
+            band = max(band, abs(previous) * description.deadband_percent / 100)
+        return abs(value - previous) < band
+
+    def _current_value(self):
+        value = self.coordinator.value(self._subscription)
         if value is not None:
             # Wenn der Sensor ein Fehlernummer-Sensor ist, geben wir den Wert als Integer zurück
             if "error_number" in self.entity_description.key:
@@ -736,111 +943,79 @@ class LambdaHeatpumpSensor(CoordinatorEntity, SensorEntity):
             return value
         return None
     
+    @property
+    def extra_state_attributes(self):
+        # Kennzeichnet Werte aus dem Zwischenspeicher, bis die erste Abfrage gelungen ist
+        if self.coordinator.restored_at is None:
+            return None
+        return {"restored_at": self.coordinator.restored_at.isoformat()}
+
     @property
     def native_unit_of_measurement(self):
         return self.entity_description.unit_of_measurement
     
     @property
     def native_translation_key(self):
-        return self.entity_description.key
+        return self._attr_translation_key
     
     @property
     def translation_key(self):
-        return self.entity_description.key
+        return self._attr_translation_key
 
-async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
-    """Richtet die Sensorplattform für einen Konfigurations-Eintrag ein."""
-    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+class LambdaCoordinatorDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Diagnose-Sensor mit Kennzahlen der Modbus-Kommunikation."""
 
-    # Hole die Konfigurationswerte aus config_flow
-    num_heatpumps = config_entry.data.get("amount_of_heatpumps", 1)
-    num_boilers = config_entry.data.get("amount_of_boilers", 0)
-    num_buffers = config_entry.data.get("amount_of_buffers", 0)
-    num_solar = config_entry.data.get("amount_of_solar", 0)
-    num_heatingcircuits = config_entry.data.get("amount_of_heat_circuits", 1)
-    model = config_entry.data.get("model", "Unknown Model")  # Hole das Modell aus der Konfiguration
-
-    device_infos = {
-        "general_ambient": DeviceInfo(
-            identifiers={(DOMAIN, f"{config_entry.entry_id}_general_ambient")},
-            name="Lambda General Ambient",
-            manufacturer=MANUFACTURER,
-            model=model,
-        ),
-        "e_manager": DeviceInfo(
-            identifiers={(DOMAIN, f"{config_entry.entry_id}_e_manager")},
-            name="Lambda E-Manager",
-            manufacturer=MANUFACTURER,
-            model=model,
-        ),
-    }
-
-    # Erstelle Geräteinformationen für mehrere Geräte pro Kategorie
-    for i in range(1, num_heatpumps + 1):
-        device_infos[f"heatpump_{i}"] = DeviceInfo(
-            identifiers={(DOMAIN, f"{config_entry.entry_id}_heatpump_{i}")},
-            name=f"Lambda Heatpump {i}",
-            manufacturer=MANUFACTURER,
-            model=model,
-        )
+    def __init__(
+        self,
+        coordinator: LambdaHeatpumpCoordinator,
+        config_entry: ConfigEntry,
+        description: LambdaDiagnosticSensorEntityDescription,
+        device_info: DeviceInfo,
+    ):
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = f"{config_entry.entry_id}_{description.key}"
+        self._attr_device_info = device_info
 
-    for i in range(1, num_boilers + 1):
-        device_infos[f"boiler_{i}"] = DeviceInfo(
-            identifiers={(DOMAIN, f"{config_entry.entry_id}_boiler_{i}")},
-            name=f"Lambda Boiler {i}",
-            manufacturer=MANUFACTURER,
-            model=model,
-        )
+    @property
+    def available(self) -> bool:
+        # Bleibt verfügbar, damit Fehler und Timeouts auch bei Verbindungsabbrüchen sichtbar sind
+        return True
 
-    for i in range(1, num_buffers + 1):
-        device_infos[f"buffer_{i}"] = DeviceInfo(
-            identifiers={(DOMAIN, f"{config_entry.entry_id}_buffer_{i}")},
-            name=f"Lambda Buffer {i}",
-            manufacturer=MANUFACTURER,
-            model=model,
-        )
+    @property
+    def native_value(self):
+        return self.entity_description.value_fn(self.coordinator.metrics)
 
-    for i in range(1, num_solar + 1):
-        device_infos[f"solar_{i}"] = DeviceInfo(
-            identifiers={(DOMAIN, f"{config_entry.entry_id}_solar_{i}")},
-            name=f"Lambda Solar {i}",
-            manufacturer=MANUFACTURER,
-            model=model,
-        )
+    @property
+    def extra_state_attributes(self):
+        if self.entity_description.attributes_fn is None:
+            return None
+        return self.entity_description.attributes_fn(self.coordinator.metrics)
 
-    for i in range(1, num_heatingcircuits + 1):
-       device_infos[f"heatingcircuit_{i}"] = DeviceInfo(
-           identifiers={(DOMAIN, f"{config_entry.entry_id}_heatingcircuit_{i}")},
-           name=f"Lambda Heating Circuit {i}",
-           manufacturer=MANUFACTURER,
-           model=model,
-       )
-    sensors = []
-    for description in SENSOR_DESCRIPTIONS:
-        if "heatpump_" in description.key and int(description.key.split('_')[1]) > num_heatpumps:
-            continue
-        if "boiler_" in description.key and int(description.key.split('_')[1]) > num_boilers:
-            continue
-        if "buffer_" in description.key and int(description.key.split('_')[1]) > num_buffers:
-            continue
-        if "solar_" in description.key and int(description.key.split('_')[1]) > num_solar:
-            continue
-        if "heatingcircuit_" in description.key and int(description.key.split('_')[1]) > num_heatingcircuits:
-            continue
-
-        category = description.key.split('_')[0]
-        # device_info = device_infos.get(description.key.split('_')[0], device_infos.get(f"{category}_{description.key.split('_')[1]}", None))
-        device_info = device_infos.get(f"{category}_{description.key.split('_')[1]}", device_infos.get(category, None))
-
-        _LOGGER.debug("Creating sensor: %s with device_info: %s", description.key, device_info)
-        
-        sensor = LambdaHeatpumpSensor(
+async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
+    """Richtet die Sensorplattform für einen Konfigurations-Eintrag ein."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    device_infos = async_get_device_infos(hass, config_entry)
+
+    sensors = [
+        LambdaHeatpumpSensor(
             coordinator=coordinator,
             config_entry=config_entry,
             description=description,
-            device_info=device_info, 
+            device_info=device_info,
+        )
+        for description, device_info in entry_descriptions(SENSOR_DESCRIPTIONS_BY_DEVICE, device_infos)
+    ]
+
+    for description in DIAGNOSTIC_SENSOR_DESCRIPTIONS:
+        sensors.append(
+            LambdaCoordinatorDiagnosticSensor(
+                coordinator=coordinator,
+                config_entry=config_entry,
+                description=description,
+                device_info=device_infos[("general_ambient", None)],
+            )
         )
-        sensors.append(sensor)
 
     async_add_entities(sensors)
 
@@ -0,0 +1,298 @@
+"""Lokaler Modbus-TCP-Simulator einer Lambda Steuerung.
+
+Stellt die Registerkarte aus SENSOR_DESCRIPTIONS und NUMBER_DESCRIPTIONS mit
+plausiblen Werten bereit, nimmt Schreibzugriffe an und kann Latenz, Jitter
+und Paketverlust nachbilden. Gedacht für Tests und Benchmarks ohne echte
+Wärmepumpe, z.B.:
+
+    python -m custom_components.lambda_heatpumps.simulator --port 5020 --heatpumps 3 --latency 30
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+import logging
+import random
+import struct
+
+from .const import MODULE_MAX_INSTANCES, MODULE_STRIDE
+from .modules import module_instance
+from .number import NUMBER_DESCRIPTIONS
+from .planner import REGISTER_FORMATS, register_size
+from .sensor import SENSOR_DESCRIPTIONS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Modbus Function Codes und Exception Codes
+READ_HOLDING_REGISTERS = 0x03
+WRITE_SINGLE_REGISTER = 0x06
+WRITE_MULTIPLE_REGISTERS = 0x10
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+
+MBAP_HEADER = struct.Struct(">HHHB")
+
+# Register, deren Wert sich zwischen zwei Abfragen leicht ändert; Einstellungen
+# (Offset ab 50 innerhalb eines Moduls) bleiben konstant
+_LIVE_DEVICE_CLASSES = ("temperature", "power")
+_SETTINGS_OFFSET = 50
+
+
+@dataclass
+class SimulatorConfig:
+    """Einstellungen des Simulators."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    packet_loss: float = 0.0
+    heatpumps: int = 1
+    boilers: int = 1
+    buffers: int = 1
+    solar: int = 0
+    heatingcircuits: int = 1
+
+    def module_count(self, module: str) -> int:
+        """Anzahl der simulierten Instanzen eines Moduls."""
+        return {
+            "heatpump": self.heatpumps,
+            "boiler": self.boilers,
+            "buffer": self.buffers,
+            "solar": self.solar,
+            "heatingcircuit": self.heatingcircuits,
+        }.get(module, 1)
+
+
+def module_registers(config: SimulatorConfig):
+    """Liefert (Register, Beschreibung) für alle konfigurierten Modulinstanzen."""
+    for description in (*SENSOR_DESCRIPTIONS, *NUMBER_DESCRIPTIONS):
+        module = module_instance(description.key)
+        if module is None or module[1] <= config.module_count(module[0]):
+            yield description.register, description
+
+
+def _initial_value(description) -> float:
+    """Plausibler Startwert (in physikalischer Einheit) für eine Beschreibung."""
+    key = description.key
+    states = getattr(description, "states", None)
+    if states:
+        # Bevorzugt einen "laufenden" Zustand, sonst den ersten definierten
+        for preferred in ("REGULATION", "CH", "AUTOMATIC", "AUTOMATIK", "DHW", "HEATING"):
+            for state, name in states.items():
+                if name == preferred:
+                    return state
+        return next(iter(states))
+    if "error" in key or "password" in key:
+        return 0
+    if getattr(description, "native_min_value", None) is not None:
+        return (description.native_min_value + description.native_max_value) / 2
+    unit = getattr(description, "unit_of_measurement", None)
+    if unit == "°C":
+        if "ambient" in key:
+            return 8.0
+        if "flow" in key:
+            return 35.0
+        if "return" in key:
+            return 30.0
+        return 45.0
+    if unit == "K":
+        return 5.0
+    if unit == "W":
+        return 1500
+    if unit == "kW":
+        return 6.5
+    if unit == "Wh":
+        return 1_250_000
+    return 0
+
+
+class LambdaModbusSimulator:
+    """Modbus-TCP-Server, der eine Lambda Steuerung nachbildet."""
+
+    def __init__(self, config: SimulatorConfig | None = None, host: str = "127.0.0.1", port: int = 5020):
+        self.config = config or SimulatorConfig()
+        self.host = host
+        self.port = port
+        self.registers: dict[int, int] = {}
+        self.request_count = 0
+        self.dropped_count = 0
+        self._types: dict[int, str] = {}
+        self._live: dict[int, tuple[str, float]] = {}
+        self._module_ranges: list[range] = [range(0, MODULE_STRIDE), range(100, 100 + MODULE_STRIDE)]
+        self._server: asyncio.base_events.Server | None = None
+        self._build_register_map()
+
+    def _build_register_map(self) -> None:
+        """Erzeugt die Registerkarte für alle konfigurierten Modulinstanzen."""
+        for register, description in module_registers(self.config):
+            if register in self._types:
+                continue
+            self._types[register] = description.data_type
+            value = _initial_value(description)
+            raw = round(value / description.factor) if description.data_type != "float32" else value / description.factor
+            self.set_value(register, raw, description.data_type)
+            if (
+                getattr(description, "device_class", None) in _LIVE_DEVICE_CLASSES
+                and register % MODULE_STRIDE < _SETTINGS_OFFSET
+            ):
+                self._live[register] = (description.data_type, raw)
+
+        for module in MODULE_MAX_INSTANCES:
+            base = next(
+                (d.register for d in SENSOR_DESCRIPTIONS if (module_instance(d.key) or (None,))[0] == module),
+                None,
+            )
+            if base is None:
+                continue
+            base -= base % 1000
+            for instance in range(1, self.config.module_count(module) + 1):
+                start = base + MODULE_STRIDE * (instance - 1)
+                self._module_ranges.append(range(start, start + MODULE_STRIDE))
+
+    def set_value(self, register: int, value, data_type: str = "int16") -> None:
+        """Setzt einen Rohwert und legt ihn als 16-Bit-Worte ab."""
+        fmt = ">" + REGISTER_FORMATS[data_type]
+        if data_type != "float32":
+            bits = struct.calcsize(fmt) * 8
+            low = -(1 << (bits - 1)) if fmt[1].islower() else 0
+            value = max(low, min(int(value), low + (1 << bits) - 1))
+        words = struct.unpack(f">{register_size(data_type)}H", struct.pack(fmt, value))
+        for offset, word in enumerate(words):
+            self.registers[register + offset] = word
+
+    def get_value(self, register: int, data_type: str = "int16"):
+        """Liest einen Rohwert aus den gespeicherten Worten."""
+        size = register_size(data_type)
+        words = [self.registers.get(register + offset, 0) for offset in range(size)]
+        return struct.unpack(">" + REGISTER_FORMATS[data_type], struct.pack(f">{size}H", *words))[0]
+
+    def _is_valid(self, address: int, count: int) -> bool:
+        return all(
+            any(register in module_range for module_range in self._module_ranges)
+            for register in range(address, address + count)
+        )
+
+    def _drift(self) -> None:
+        """Lässt Temperaturen und Leistungen um ihren Startwert schwanken."""
+        for register, (data_type, base) in self._live.items():
+            self.set_value(register, base + random.randint(-3, 3), data_type)
+
+    def _written(self, address: int, count: int) -> None:
+        """Übernimmt geschriebene Werte als neuen Ausgangswert für die Schwankung."""
+        for register in range(address, address + count):
+            if register in self._live:
+                data_type, _ = self._live[register]
+                self._live[register] = (data_type, self.get_value(register, data_type))
+
+    def handle_pdu(self, pdu: bytes) -> bytes:
+        """Verarbeitet eine Modbus-PDU und gibt die Antwort-PDU zurück."""
+        function = pdu[0]
+        if function == READ_HOLDING_REGISTERS:
+            address, count = struct.unpack_from(">HH", pdu, 1)
+            if not 1 <= count <= 125 or not self._is_valid(address, count):
+                return bytes((function | 0x80, ILLEGAL_DATA_ADDRESS))
+            self._drift()
+            words = [self.registers.get(register, 0) for register in range(address, address + count)]
+            return struct.pack(f">BB{count}H", function, count * 2, *words)
+        if function == WRITE_SINGLE_REGISTER:
+            address, value = struct.unpack_from(">HH", pdu, 1)
+            if not self._is_valid(address, 1):
+                return bytes((function | 0x80, ILLEGAL_DATA_ADDRESS))
+            self.registers[address] = value
+            self._written(address, 1)
+            return pdu[:5]
+        if function == WRITE_MULTIPLE_REGISTERS:
+            address, count = struct.unpack_from(">HH", pdu, 1)
+            if not self._is_valid(address, count):
+                return bytes((function | 0x80, ILLEGAL_DATA_ADDRESS))
+            for offset, value in enumerate(struct.unpack_from(f">{count}H", pdu, 6)):
+                self.registers[address + offset] = value
+            self._written(address, count)
+            return pdu[:5]
+        return bytes((function | 0x80, ILLEGAL_FUNCTION))
+
+    async def _respond(self, writer: asyncio.StreamWriter, transaction_id: int, unit: int, pdu: bytes) -> None:
+        config = self.config
+        delay = config.latency + random.uniform(-config.jitter, config.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if config.packet_loss and random.random() < config.packet_loss:
+            self.dropped_count += 1
+            return
+        response = self.handle_pdu(pdu)
+        writer.write(MBAP_HEADER.pack(transaction_id, 0, len(response) + 1, unit) + response)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Jede Anfrage wird in einer eigenen Task beantwortet, damit mehrere
+        # Transaktionen gleichzeitig offen sein können.
+        tasks = set()
+        try:
+            while True:
+                header = await reader.readexactly(MBAP_HEADER.size)
+                transaction_id, _, length, unit = MBAP_HEADER.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+                self.request_count += 1
+                task = asyncio.create_task(self._respond(writer, transaction_id, unit, pdu))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def start(self) -> None:
+        """Startet den Server."""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        if not self.port:
+            self.port = self._server.sockets[0].getsockname()[1]
+        _LOGGER.info(f"Lambda simulator listening on {self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        """Stoppt den Server."""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Lambda Modbus TCP simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5020)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latenz pro Anfrage in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Jitter in ms")
+    parser.add_argument("--loss", type=float, default=0.0, help="Anteil verworfener Anfragen (0-1)")
+    parser.add_argument("--heatpumps", type=int, default=1)
+    parser.add_argument("--boilers", type=int, default=1)
+    parser.add_argument("--buffers", type=int, default=1)
+    parser.add_argument("--solar", type=int, default=0)
+    parser.add_argument("--heatingcircuits", type=int, default=1)
+    args = parser.parse_args()
+
+    config = SimulatorConfig(
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        packet_loss=args.loss,
+        heatpumps=args.heatpumps,
+        boilers=args.boilers,
+        buffers=args.buffers,
+        solar=args.solar,
+        heatingcircuits=args.heatingcircuits,
+    )
+
+    async def run() -> None:
+        simulator = LambdaModbusSimulator(config, args.host, args.port)
+        await simulator.start()
+        await asyncio.Event().wait()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()